@@ -35,6 +35,7 @@ import abc
 import pdb
 import sys
 import random
+import functools
 
 import qiskit as qk
 import numpy as np
@@ -1296,7 +1297,17 @@ def _parse_qasm_qk(qasm):
         'n' - number of qubits, 'gates' - list of gates in circuit in form
         ['gate_type', *parameters, *qubit(s)], 'n_gates' - number of gates in
         circuit.
+
+    Parsing is memoised on the qasm string (ansatz built from the same qasm 
+    e.g. for a sweep over geometries only parse it once), the returned dict
+    and gate lists are fresh copies
     """
+    n, gates = _parse_qasm_qk_cached(qasm)
+    return {'n': n, 'gates': [list(gate) for gate in gates], 'n_gates': len(gates)}
+
+@functools.lru_cache(maxsize=128)
+def _parse_qasm_qk_cached(qasm):
+    """ _parse_qasm_qk returning (n, tuple of gate tuples) """
     lns = qasm.split(';\n')
     n = int(lns[2][7:-1])
     gates = [l.replace("("," ").replace(")","").replace(","," ").split(" ") for l in lns[3:] if l]
@@ -1311,5 +1322,4 @@ def _parse_qasm_qk(qasm):
                         gate[i+1]=str(eval(prm)) # Using eval instead of custom code. str is to make everything type consistent
                     except:
                         pass
-    circ_info = {'n': n, 'gates': gates, 'n_gates': len(gates)}
-    return circ_info
\ No newline at end of file
+    return n, tuple(tuple(gate) for gate in gates)
\ No newline at end of file
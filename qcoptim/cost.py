@@ -45,6 +45,10 @@ __all__ = [
     'GraphCyclWitness3Cost',
     'freq_even',
     'expected_parity',
+    'expected_parities',
+    'parities_from_masks',
+    'get_counts_cached',
+    'counts_to_arrays',
     'get_substring',
     'bind_params',
     'CostWPO',
@@ -55,6 +59,8 @@ import abc
 import pdb
 import sys
 import copy
+import weakref
+import functools
 
 import numpy as np
 import scipy as sp
@@ -70,6 +76,12 @@ from qiskit.quantum_info.operators import Operator, Pauli
 
 from . import utilities as ut
 
+# numba is optional, it only speeds up the reduction of counts to parities
+try:
+    import numba
+except ImportError:
+    numba = None
+
 #import itertools as it
 pi =np.pi
 
@@ -174,6 +186,11 @@ class CostInterface(metaclass=abc.ABCMeta):
             optional to specify a name to give the results list
             TODO: extend to allow list of names"""
         raise NotImplementedError
+
+    def evaluate_cost_batch(self, results_obj, names):
+        """ Returns the list of costs, one for each name in names. Subclasses
+        can override this to avoid going through results_obj once per name"""
+        return [self.evaluate_cost(results_obj, name=n) for n in names]
     
     def bind_params_to_meas(self,params=None,params_names=None):
         """ 
@@ -202,11 +219,26 @@ class CostInterface(metaclass=abc.ABCMeta):
                 params_names = [None] * len(params)
             else:
                 assert len(params_names) == len(params)
-            bound_circuits = []
-            for p, pn in zip(params, params_names):
-                bound_circuits += bind_params(self.meas_circuits, p, self.qk_vars, pn)
+            meas_circuits = self.meas_circuits
+            param_index = self._param_index(meas_circuits)
+            bound_circuits = bind_params_points(meas_circuits, params, 
+                                                params_names, param_index)
         return bound_circuits   
 
+    def _param_index(self, circuits):
+        """ 
+        Returns the (cached) order of each circuit's parameters in 
+        self.qk_vars, see gen_param_index. Computed once per circuit so
+        that binding does not have to walk the parameter table every call
+        """
+        cache = self.__dict__.setdefault('_param_index_cache', {})
+        missing = [cc for cc in circuits if id(cc) not in cache]
+        if len(missing) > 0:
+            for cc, pi in zip(missing, gen_param_index(missing, self.qk_vars)):
+                # keep a ref to the circuit so its id cannot be reused
+                cache[id(cc)] = (cc, pi)
+        return [cache[id(cc)][1] for cc in circuits]
+
 class GenericCost(CostInterface):
 
     def evaluate_cost(
@@ -258,6 +290,9 @@ class Cost(CostInterface):
             ansatz : Ansatz object 
             instance : qiskit quantum instance
             fix_transpile : boolean if True circuits are only transpiled once
+                (the parametrised measurement circuits are transpiled at init, 
+                through ut.transpile_cached so costs built on the same ansatz 
+                and instance share them, and each evaluation only binds them)
             keep_res : boolean systematically keep the Results Object from execution
             verbose : boolean print some results
             debug: boolean allows to enter debug mode
@@ -288,7 +323,7 @@ class Cost(CostInterface):
         self._qk_vars = ansatz.params
         self._meas_circuits = ut.gen_meas_circuits(self._untranspiled_main_circuit, 
                                                    self._list_meas)
-        self._meas_circuits = self.instance.transpile(self._meas_circuits)
+        self._meas_circuits = ut.transpile_cached(self.instance, self._meas_circuits)
         self._label_circuits()
         #--------------------------------------
         self.err_corr = error_correction
@@ -325,7 +360,7 @@ class Cost(CostInterface):
         if self._keep_res:
             self._res.append(results)
         # Evaluate cost functions based on results
-        res = np.array(self.evaluate_cost(results, name = name_params))
+        res = np.asarray(self.evaluate_cost(results, name = name_params))
             
         if np.ndim(res) == 1: 
             res = res[:,np.newaxis]
@@ -375,17 +410,38 @@ class Cost(CostInterface):
         if type(name) is str:
             res = self._evaluate_cost_one_name(results_obj, name)
         else:
-            res = [self._evaluate_cost_one_name(results_obj, n) for n in name]
+            res = self.evaluate_cost_batch(results_obj, name)
         return res
 
+    def evaluate_cost_batch(self, results_obj, names):
+        """ Same as evaluate_cost with a list of names, but goes through the 
+        experiments of results_obj only once"""
+        if 'evaluate_cost' in self.__dict__:
+            # evaluate_cost has been replaced (e.g. by an operator overload)
+            return super().evaluate_cost_batch(results_obj, names)
+        count_lists = self._counts_by_name(results_obj, names)
+        return [self._wrap_cost(self._meas_func(cl)) for cl in count_lists]
+
     def _evaluate_cost_one_name(self, results_obj, name):
         """ same as above except it takes as input a single name"""
-        count_list = []
-        for ii in range(len(results_obj.results)):
-            if name in results_obj.results[ii].header.name:
-                count_list.append(results_obj.get_counts(ii))
+        count_list = self._counts_by_name(results_obj, [name])[0]
         return self._wrap_cost(self._meas_func(count_list))
 
+    @staticmethod
+    def _counts_by_name(results_obj, names):
+        """ For each name returns the list of counts of the experiments whose
+        name contain it (in the order of results_obj)"""
+        count_lists = [[] for _ in names]
+        for ii, experiment in enumerate(results_obj.results):
+            exp_name = experiment.header.name
+            counts = None
+            for jj, name in enumerate(names):
+                if name in exp_name:
+                    if counts is None:
+                        counts = get_counts_cached(results_obj, ii)
+                    count_lists[jj].append(counts)
+        return count_lists
+
     def shot_noise(self, params, nb_experiments=8):
         """ Sends a single job many times to see shot noise"""        
         params = [params for ii in range(nb_experiments)]
@@ -576,7 +632,7 @@ class GHZPauliCost3qubits(Cost):
         def meas_func(counts):
             x_counts = counts[:-1]
             x_parity = np.dot([expected_parity(c) for c in x_counts], weights)
-            z_parity = expected_parity(counts[-1], [1,2]) + expected_parity(counts[-1], [0,2]) + expected_parity(counts[-1], [0,1])
+            z_parity = np.sum(expected_parities(counts[-1], [[1,2], [0,2], [0,1]]))
             return (1 + x_parity + z_parity)/dim
         return meas_func
     
@@ -598,7 +654,7 @@ class GHZWitness1Cost(Cost):
         N = self.nb_qubits
         def meas_func(counts):
             S1 = freq_even(counts[0])
-            S2 = np.array([freq_even(counts[1], indices=[i,i+1]) for i in range(N-1)])
+            S2 = (1 + expected_parities(counts[1], [[i,i+1] for i in range(N-1)])) / 2
             return 0.5*(S1-1) + np.prod((S2+1)/2)
         return meas_func
 
@@ -616,7 +672,7 @@ class GHZWitness2Cost(Cost):
         N = self.nb_qubits
         def meas_func(counts):
             S1 = freq_even(counts[0])
-            S2 = np.array([freq_even(counts[1], indices=[i,i+1]) for i in range(N-1)])
+            S2 = (1 + expected_parities(counts[1], [[i,i+1] for i in range(N-1)])) / 2
             return S1 + np.sum(S2) - (N -1)
         return meas_func
     
@@ -712,8 +768,8 @@ class GraphCyclWitness1Cost(Cost):
             ind_even = [[i, i+1, i+2] for i in range(1,N-2, 2)] + [[0, 1, N-1]]
             def meas_func(counts):
                 counts_odd, counts_even = counts[0], counts[1]
-                S_odd = np.array([expected_parity(counts_odd, indices=i) for i in ind_odd])
-                S_even = np.array([expected_parity(counts_even, indices=i) for i in ind_even])
+                S_odd = expected_parities(counts_odd, ind_odd)
+                S_even = expected_parities(counts_even, ind_even)
                 return 0.5*(S_even[-1]-1) + np.prod((S_odd+1)/2) * np.prod((S_even[:-1]+1)/2)
         return meas_func
 
@@ -740,8 +796,8 @@ class GraphCyclWitness2Cost(Cost):
             ind_even = [[i, i+1, i+2] for i in range(1,N-2, 2)] + [[0, 1, N-1]]
             def meas_func(counts):
                 counts_odd, counts_even = counts[0], counts[1]
-                S_odd = np.array([expected_parity(counts_odd, indices=i) for i in ind_odd])
-                S_even = np.array([expected_parity(counts_even, indices=i) for i in ind_even])
+                S_odd = expected_parities(counts_odd, ind_odd)
+                S_even = expected_parities(counts_even, ind_even)
                 return np.sum(S_odd) + np.sum(S_even) - (N-1)
         return meas_func
 
@@ -817,6 +873,11 @@ class RandomXYCost(Cost):
                  debug = False, 
                  error_correction = False,
                  name = None, **args):
+        assert ansatz.nb_qubits == hamiltonian.shape[0], "Input hamiltonian must have same dims as nb_qubits (see docstring)"
+        assert hamiltonian.shape[0] == hamiltonian.shape[1], "Input Hamiltonian should be square (see docstring)"
+        # needed by _gen_meas_func, called in super().__init__
+        self.hamiltonian = hamiltonian
+        self._xy_masks, self._xy_coeffs = _xy_masks_and_coeffs(hamiltonian)
         super().__init__( ansatz, instance, 
                          fix_transpile, # maybe redundent now
                          keep_res, 
@@ -824,9 +885,6 @@ class RandomXYCost(Cost):
                          debug, 
                          error_correction,
                          name, **args)
-        assert self.nb_qubits == hamiltonian.shape[0], "Input hamiltonian must have same dims as nb_qubits (see docstring)"
-        assert hamiltonian.shape[0] == hamiltonian.shape[1], "Input Hamiltonian should be square (see docstring)"
-        self.hamiltonian = hamiltonian
     def _gen_list_meas(self):
         nb_qubits = self.nb_qubits
         x = 'x'*nb_qubits
@@ -834,16 +892,34 @@ class RandomXYCost(Cost):
         return [x,y]
     
     def _gen_meas_func(self):
+        masks, coeffs = self._xy_masks, self._xy_coeffs
         def func(count_list):
-            xy_term = 0
-            for ii in range(self.nb_qubits):
-                for jj in range(self.nb_qubits):
-                    if ii != jj:
-                        xy_term += self.hamiltonian[ii,jj] * ut.pauli_correlation(count_list[0], ii, jj)
-                        xy_term += self.hamiltonian[ii,jj] * ut.pauli_correlation(count_list[1], ii, jj)
-            return xy_term
+            xy_parities = (parities_from_masks(count_list[0], masks) 
+                           + parities_from_masks(count_list[1], masks))
+            return coeffs.dot(xy_parities)
         return func
 
+
+def _xy_masks_and_coeffs(hamiltonian):
+    """ Masks (see _indices_to_mask) of the qubit pairs and couplings of the
+    off diagonal terms of a random xy hamiltonian. Same terms as 
+    ut.pauli_correlation(counts, ii, jj) summed over ii != jj (which reads the 
+    outcome strings from the left), with the (ii, jj) and (jj, ii) terms 
+    merged. Memoised on the hamiltonian values (outputs are read only) """
+    hamiltonian = np.ascontiguousarray(hamiltonian, dtype=float)
+    return _xy_masks_and_coeffs_cached(hamiltonian.shape[0], hamiltonian.tobytes())
+
+@functools.lru_cache(maxsize=32)
+def _xy_masks_and_coeffs_cached(nb_qubits, hamiltonian_bytes):
+    """ see _xy_masks_and_coeffs """
+    hamiltonian = np.frombuffer(hamiltonian_bytes).reshape(nb_qubits, nb_qubits)
+    ii, jj = np.triu_indices(nb_qubits, k=1)
+    masks = ((1 << (nb_qubits-1-ii)) | (1 << (nb_qubits-1-jj))).astype(np.int64)
+    coeffs = hamiltonian[ii,jj] + hamiltonian[jj,ii]
+    masks.setflags(write=False)
+    coeffs.setflags(write=False)
+    return masks, coeffs
+
 #======================#
 # Random xy-Hamiltonian related cost
 #======================#
@@ -864,6 +940,11 @@ class RandomXYCostWithZ(Cost):
                  debug = False, 
                  error_correction = False,
                  name = None, **args):
+        assert ansatz.nb_qubits == hamiltonian.shape[0], "Input hamiltonian must have same dims as nb_qubits (see docstring)"
+        assert hamiltonian.shape[0] == hamiltonian.shape[1], "Input Hamiltonian should be square (see docstring)"
+        # needed by _gen_meas_func, called in super().__init__
+        self.hamiltonian = hamiltonian
+        self._xy_masks, self._xy_coeffs = _xy_masks_and_coeffs(hamiltonian)
         super().__init__( ansatz, instance, 
                          fix_transpile, # maybe redundent now
                          keep_res, 
@@ -871,9 +952,6 @@ class RandomXYCostWithZ(Cost):
                          debug, 
                          error_correction,
                          name, **args)
-        assert self.nb_qubits == hamiltonian.shape[0], "Input hamiltonian must have same dims as nb_qubits (see docstring)"
-        assert hamiltonian.shape[0] == hamiltonian.shape[1], "Input Hamiltonian should be square (see docstring)"
-        self.hamiltonian = hamiltonian
     def _gen_list_meas(self):
         nb_qubits = self.nb_qubits
         z = 'z'*nb_qubits
@@ -882,17 +960,16 @@ class RandomXYCostWithZ(Cost):
         return [z,x,y]
     
     def _gen_meas_func(self):
+        nb_qubits = self.nb_qubits
+        # ut.pauli_correlation(counts, ii) is minus the parity of that qubit
+        z_masks = (1 << (nb_qubits - 1 - np.arange(nb_qubits))).astype(np.int64)
+        z_coeffs = -np.diag(self.hamiltonian)
+        xy_masks, xy_coeffs = self._xy_masks, self._xy_coeffs
         def func(count_list):
-            longitudinal_field = np.diag(self.hamiltonian)
-            field_term = [longitudinal_field[ii] * ut.pauli_correlation(count_list[0], ii) for ii in range(self.nb_qubits)]
-            field_term = sum(field_term)
-            xy_term = 0
-            for ii in range(self.nb_qubits):
-                for jj in range(self.nb_qubits):
-                    if ii != jj:
-                        xy_term += self.hamiltonian[ii,jj] * ut.pauli_correlation(count_list[1], ii, jj)
-                        xy_term += self.hamiltonian[ii,jj] * ut.pauli_correlation(count_list[2], ii, jj)
-            return field_term + xy_term
+            field_term = z_coeffs.dot(parities_from_masks(count_list[0], z_masks))
+            xy_parities = (parities_from_masks(count_list[1], xy_masks) 
+                           + parities_from_masks(count_list[2], xy_masks))
+            return field_term + xy_coeffs.dot(xy_parities)
         return func
 
 
@@ -1062,6 +1139,28 @@ class ChemistryCost(Cost):
 # Functions to compute expected values based on measurement outcomes counts as
 # returned by qiskit
 # ------------------------------------------------------
+# results obj -> {experiment (index or name): counts dict}, entries go away
+# with the results obj
+_COUNTS_CACHE = weakref.WeakKeyDictionary()
+
+def get_counts_cached(results_obj, experiment):
+    """ Same as results_obj.get_counts(experiment), but memoised per results 
+    object so that experiments shared between several cost evaluations (e.g.
+    points shared between optimisers, or the fixed comparison results of 
+    CrossFidelity) are only converted to counts once. The counts dicts are 
+    shared, don't modify them
+    """
+    try:
+        cache = _COUNTS_CACHE.setdefault(results_obj, {})
+    except TypeError:
+        # not weak referenceable
+        return results_obj.get_counts(experiment)
+    counts = cache.get(experiment)
+    if counts is None:
+        counts = results_obj.get_counts(experiment)
+        cache[experiment] = counts
+    return counts
+
 def freq_even(count_result, indices=None):
     """ return the frequency of +1 eigenvalues:
     The +1 e.v. case corresponds to the case where the number of 0 in the
@@ -1071,13 +1170,117 @@ def freq_even(count_result, indices=None):
              if not None it allows to consider only selected elements of the
              outcome string
     """
-    nb_odd, nb_even = 0, 0
-    for k, v in count_result.items():
-        k_invert = k[::-1]
-        sub_k = get_substring(k_invert, indices)
-        nb_even += v * (sub_k.count('1')%2 == 0)
-        nb_odd += v * (sub_k.count('1')%2)
-    return nb_even / (nb_odd + nb_even)
+    arrays = counts_to_arrays(count_result)
+    if arrays is None:
+        nb_odd, nb_even = 0, 0
+        for k, v in count_result.items():
+            k_invert = k[::-1]
+            sub_k = get_substring(k_invert, indices)
+            nb_even += v * (sub_k.count('1')%2 == 0)
+            nb_odd += v * (sub_k.count('1')%2)
+        return nb_even / (nb_odd + nb_even)
+    bits, shots = arrays
+    mask = -1 if indices is None else _indices_to_mask(indices)
+    nb_tot = shots.sum()
+    return (nb_tot + _parity_sum(bits, shots, mask)) / (2 * nb_tot)
+
+def counts_to_arrays(count_result):
+    """ Converts a counts dict to two int64 arrays (outcomes, counts), where 
+    bit i of an outcome is the value measured on qubit i (i.e. the outcome 
+    string read from the right). Returns None if the outcome strings are too
+    long to fit in an int64
+    Spaces between registers count as bits that are always 0, so bit i is 
+    still character i of the reversed string (same indexing as get_substring
+    in freq_even)
+    """
+    keys = [k.replace(' ', '0') for k in count_result.keys()]
+    if max([len(k) for k in keys], default=0) > 62:
+        return None
+    bits = np.fromiter((int(k, 2) for k in keys), dtype=np.int64, count=len(keys))
+    shots = np.fromiter(count_result.values(), dtype=np.int64, count=len(keys))
+    return bits, shots
+
+def _indices_to_mask(indices):
+    """ int mask selecting the bits in indices (xor so that repeated indices
+    cancel out, as they do in the parity of the substring)"""
+    mask = 0
+    for ind in indices:
+        mask ^= 1 << int(ind)
+    return mask
+
+def _parity_sum_loop(bits, shots, mask):
+    """ sum_i shots[i] * (-1)^popcount(bits[i] & mask), compiled with numba"""
+    acc = 0
+    for ii in range(bits.shape[0]):
+        bb = bits[ii] & mask
+        parity = 0
+        while bb != 0:
+            parity ^= 1
+            bb &= bb - 1
+        acc += shots[ii] * (1 - 2 * parity)
+    return acc
+
+def _parity_sum_np(bits, shots, mask):
+    """ same as _parity_sum_loop, numpy fallback if numba is not installed"""
+    bb = bits & mask
+    for shift in (32, 16, 8, 4, 2, 1):
+        bb = bb ^ (bb >> shift)
+    return np.dot(shots, 1 - 2 * (bb & 1))
+
+def _parity_sums_loop(bits, shots, masks):
+    """ _parity_sum_loop for several masks at once, with a branchless (SWAR)
+    popcount, compiled with numba"""
+    acc = np.zeros(masks.shape[0], dtype=np.int64)
+    for jj in range(masks.shape[0]):
+        for ii in range(bits.shape[0]):
+            bb = bits[ii] & masks[jj]
+            bb = bb - ((bb >> 1) & 0x5555555555555555)
+            bb = (bb & 0x3333333333333333) + ((bb >> 2) & 0x3333333333333333)
+            bb = (bb + (bb >> 4)) & 0x0F0F0F0F0F0F0F0F
+            bb = (bb * 0x0101010101010101) >> 56
+            acc[jj] += shots[ii] * (1 - 2 * (bb & 1))
+    return acc
+
+def _parity_sums_np(bits, shots, masks):
+    """ same as _parity_sums_loop, numpy fallback if numba is not installed"""
+    bb = bits[:,np.newaxis] & masks[np.newaxis,:]
+    if hasattr(np, 'bitwise_count'):
+        parity = np.bitwise_count(bb) & 1
+    else:
+        for shift in (32, 16, 8, 4, 2, 1):
+            bb = bb ^ (bb >> shift)
+        parity = bb & 1
+    return shots.dot(1 - 2 * parity.astype(np.int64))
+
+if numba is not None:
+    _parity_sum = numba.njit(cache=True)(_parity_sum_loop)
+    _parity_sums = numba.njit(cache=True)(_parity_sums_loop)
+else:
+    _parity_sum = _parity_sum_np
+    _parity_sums = _parity_sums_np
+
+def expected_parities(results, list_indices):
+    """ Same as [expected_parity(results, ind) for ind in list_indices] but
+    the counts are converted only once and all the parities are computed
+    together
+    """
+    arrays = counts_to_arrays(results)
+    if arrays is None:
+        return np.array([expected_parity(results, ind) for ind in list_indices])
+    bits, shots = arrays
+    masks = np.array([_indices_to_mask(ind) for ind in list_indices], dtype=np.int64)
+    return _parity_sums(bits, shots, masks) / shots.sum()
+
+def parities_from_masks(results, masks):
+    """ Same as expected_parities, with the subsets of qubits already given
+    as an int64 array of masks (see _indices_to_mask), so that costs can 
+    build them once """
+    arrays = counts_to_arrays(results)
+    if arrays is None:
+        list_indices = [[ii for ii in range(63) if (int(mm) >> ii) & 1] for mm in masks]
+        return np.array([expected_parity(results, ind) for ind in list_indices])
+    bits, shots = arrays
+    return _parity_sums(bits, shots, masks) / shots.sum()
 
 def expected_parity(results,indices=None):
     """ return the estimated value of the expectation of the parity operator:
@@ -1104,9 +1307,24 @@ def reduce_commuting_meas(settings, coeffs = None, include_groupings = False):
         if true output returns a dict mapping measurment settings to coefficients 
         else, simply returns reduced measurement settings
     """
-    import openfermion 
     if type(coeffs) == type(None):
         coeffs = np.ones(len(settings))
+    new_settings = _group_commuting_terms(tuple(settings), 
+                                          tuple(np.asarray(coeffs).tolist()))
+    if include_groupings:
+        # copies, the cached operators must not be modified by the callers
+        return [(sett, copy.deepcopy(op)) for sett, op in new_settings]
+    else:
+        return [ss[0] for ss in new_settings]
+
+
+@functools.lru_cache(maxsize=None)
+def _group_commuting_terms(settings, coeffs):
+    """ Memoised grouping of reduce_commuting_meas (settings and coeffs as 
+    tuples), so that several cost objs built for the same terms only call
+    openfermion once. Returns a tuple of (new setting, grouped operator), 
+    the operators are shared by all the callers so don't modify them """
+    import openfermion 
     openfermion_notation_vec = []
     for sett in settings:
         openfermion_notation = ''
@@ -1127,10 +1345,7 @@ def reduce_commuting_meas(settings, coeffs = None, include_groupings = False):
         for s in sett:
             new_sett = new_sett[:(s[0])] + s[1].lower() + new_sett[(s[0]+1):]
         new_settings.append((new_sett, coef))
-    if include_groupings:
-        return new_settings
-    else:
-        return [ss[0] for ss in new_settings]
+    return tuple(new_settings)
     
 
 def reduce_commuting_meas_func(new_settings, offset = 0):
@@ -1157,15 +1372,16 @@ def reduce_commuting_meas_func(new_settings, offset = 0):
                 weights.append(op[kk])
         return qubits, weights
     
+    # extracted once here rather than deep copying the settings on each call
+    internal_settings = [_relevant_qubits_from_op(sett[1]) for sett in new_settings]
+    internal_offset = copy.deepcopy(offset)
+
     def _gen_reduced_meas_func(counts):
         """
         Made to replace _gen_meas_func in Graph/Pauli cost to reduce operators"""
         running_sum = 0
-        internal_settings = copy.deepcopy(new_settings)
-        internal_offset = copy.deepcopy(offset)
-        for ct, sett in enumerate(internal_settings):
-            idx, weights = _relevant_qubits_from_op(sett[1])
-            parity_vec_for_commuting_settings = [expected_parity(counts[ct], ii) for ii in idx]
+        for ct, (idx, weights) in enumerate(internal_settings):
+            parity_vec_for_commuting_settings = expected_parities(counts[ct], idx)
             running_sum += np.dot(parity_vec_for_commuting_settings, weights)
         return running_sum + internal_offset
     
@@ -1218,7 +1434,28 @@ def gen_meas_circuits(main_circuit, meas_settings, logical_qubits=None):
     print(" This has now beed moved to utilities")
     return None
 
-def bind_params(circ, param_values, param_variables, param_name = None):
+def gen_param_index(circ, param_variables):
+    """ For each circuit return a tuple (params, index) where params are the
+    circuit's parameter objects and index the position of each of them in 
+    param_variables, s.t. values to bind are param_values[index]
+    Parameters
+    ----------
+    circ : list of quantum circuits
+    param_variables: list of qk_vars
+
+    Returns
+    -------
+        list of (tuple, np.array) pairs, one per circuit
+    """
+    lookup = {var:ii for ii,var in enumerate(param_variables)}
+    param_index = []
+    for cc in circ:
+        params = tuple(cc.parameters)
+        param_index.append((params, np.array([lookup[pp] for pp in params], dtype=int)))
+    return param_index
+
+def bind_params(circ, param_values, param_variables, param_name = None,
+                param_index = None):
     """ Take a list of circuits with bindable parameters and bind the values 
     passed according to the param_variables
     Returns the list of circuits with bound values 
@@ -1232,19 +1469,55 @@ def bind_params(circ, param_values, param_variables, param_name = None):
         to the param_values
     param_name: str if not None it will used to prepend the names
         of the circuits created
+    param_index: list, optional
+        Output of gen_param_index(circ, param_variables), pass it when 
+        binding the same circuits many times to avoid recomputing it
 
     Returns
     -------
         quantum circuits
     """
     if type(circ) != list: circ = [circ]
-    val_dict = {key:val for key,val in zip(param_variables, param_values)}
-    bound_circ = [cc.bind_parameters(val_dict) for cc in circ]
+    if param_index is None:
+        param_index = gen_param_index(circ, param_variables)
+    param_values = np.asarray(param_values)
+    bound_circ = [cc.assign_parameters(dict(zip(params, param_values[idx])))
+                  for cc, (params, idx) in zip(circ, param_index)]
     if param_name is not None:
-        bound_circ = ut.prefix_to_names(bound_circ, param_name)
+        # bound circuits are already new objects, so rename them in place
+        # rather than making another copy with ut.prefix_to_names
+        for cc in bound_circ:
+            cc.name = param_name + cc.name
     return bound_circ  
 
 
+def bind_params_points(circ, params, params_names, param_index):
+    """ Same as concatenating bind_params(circ, p, .., pn, param_index) over
+    zip(params, params_names) (i.e. circuits are ordered point by point), but
+    the values of each circuit's parameters are gathered for all the points 
+    in one go
+    Parameters
+    ----------
+    circ : list of quantum circuits
+    params : 2d array, one row per parameter point
+    params_names : list of str or None, one per row of params
+    param_index : output of gen_param_index(circ, param_variables)
+
+    Returns
+    -------
+        quantum circuits
+    """
+    params = np.asarray(params)
+    circ_values = [params[:, idx] for _, idx in param_index]
+    bound_circ = []
+    for ii, pn in enumerate(params_names):
+        for cc, (pars, _), values in zip(circ, param_index, circ_values):
+            bc = cc.assign_parameters(dict(zip(pars, values[ii])))
+            if pn is not None:
+                bc.name = pn + bc.name
+            bound_circ.append(bc)
+    return bound_circ
+
 
 #======================#
 # Qiskit WPO class
@@ -1292,7 +1565,7 @@ class CostWPO(CostInterface):
             statevector_mode=self.instance.is_statevector,
             qr=circuit_cp.qregs[0]
             )
-        self._meas_circuits = self.instance.transpile(measurement_circuits)
+        self._meas_circuits = ut.transpile_cached(self.instance, measurement_circuits)
 
     def evaluate_cost_and_std(
         self, 
@@ -1430,7 +1703,7 @@ class CrossFidelity(CostInterface):
 
         # generate and store set of measurement circuits here
         self._meas_circuits = self._gen_random_measurements()
-        self._meas_circuits = self.instance.transpile(self._meas_circuits)
+        self._meas_circuits = ut.transpile_cached(self.instance, self._meas_circuits)
 
         # run setter (see below)
         self.comparison_results = comparison_results
@@ -1492,6 +1765,8 @@ class CrossFidelity(CostInterface):
                 v['data']['counts'] = new_counts
 
         self._comparison_results = results
+        # qiskit Result version, built the first time it is needed
+        self._comparison_results_obj = None
 
     def _gen_random_measurements(self):
         """
@@ -1597,9 +1872,9 @@ class CrossFidelity(CostInterface):
             else:
                 _meas_circuits = self._meas_circuits
 
-            bound_circuits = []
-            for p, pn in zip(params, params_names):
-                bound_circuits += bind_params(_meas_circuits, p, self.qk_vars, pn)
+            param_index = self._param_index(_meas_circuits)
+            bound_circuits = bind_params_points(_meas_circuits, params, 
+                                                params_names, param_index)
         return bound_circuits
 
     def evaluate_cost(
@@ -1646,8 +1921,10 @@ class CrossFidelity(CostInterface):
             raise ValueError
 
         # convert comparison_results back to qiskit results obj, so we can
-        # use `get_counts` method
-        comparison_results = qk.result.Result.from_dict(self._comparison_results)
+        # use `get_counts` method (only once, its counts are then memoised)
+        if getattr(self, '_comparison_results_obj', None) is None:
+            self._comparison_results_obj = qk.result.Result.from_dict(self._comparison_results)
+        comparison_results = self._comparison_results_obj
 
         # setup depending on whether we are subsampling
         if self._subsample_size is not None:
@@ -1675,7 +1952,7 @@ class CrossFidelity(CostInterface):
             # try to extract matching experiment data
             try:
                 countsdict_1_fixedU = results.get_counts(name+self._prefix+str(uidx))
-                countsdict_2_fixedU = comparison_results.get_counts(self._prefix+str(uidx))
+                countsdict_2_fixedU = get_counts_cached(comparison_results, self._prefix+str(uidx))
             except QiskitError:
                 if self._subsample_size is None:
                     print('Cannot extract matching experiment data to calculate cross-fidelity.',
@@ -5,24 +5,49 @@ __all__ = [
     'ParallelRunner',
     'MethodBO',
     'MethodSPSA',
+    'MethodBoTorch',
+    'ParallelAcquisitionOptimizer',
+    'Matern52f32',
+    'RBFf32',
     'check_cost_objs_consistency',
     'SingleBO',
     'SingleSPSA'
 ]
 
+import os
 import sys
 import pdb
 import copy
+import itertools
+import collections
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
+import GPy
 import GPyOpt
 from GPyOpt.experiment_design import initial_design
+from GPyOpt.optimization import acquisition_optimizer as gpyopt_acq
 
 from . import utilities as ut
 from . import cost
 
+# numba is optional, it only compiles the kernel distances (see _gen_dist_kernel)
+try:
+    import numba
+except ImportError:
+    numba = None
+
 pi = np.pi
+TWO_PI = 2*np.pi
+# max number of parameter points whose bound circuits are kept by ParallelRunner
+BIND_CACHE_SIZE = 512
+# max number of circuits accepted in a single job by most backends
+MAX_CIRCUITS_PER_JOB = 900
+# source of the ParallelRunner prefixes
+_prefix_counter = itertools.count()
+# compiled pairwise distance functions, keyed by nb_params
+_DIST_KERNELS = {}
 
 class Method(ABC):
     """
@@ -125,9 +150,16 @@ class MethodBO(Method):
             args_cp['initial_design_numdata'] = 0
         else:
             self.evaluated_init = True
+        if args_cp.get('kernel_fp32') and args_cp.get('kernel') is None:
+            # same kernel as the GPyOpt default, with float32 distances
+            args_cp['kernel'] = Matern52f32(len(args_cp['domain']), variance=1., 
+                                            ARD=args_cp.get('ARD', False))
+            self._fp32_kernel = args_cp['kernel']
         self.optimiser = GPyOpt.methods.BayesianOptimization(**args_cp)
         # workaround
         self.optimiser.num_acquisitions = 1
+        if args_cp.get('acquisition_nb_workers') is not None:
+            self._setup_parallel_acquisition(args_cp)
         self._setup_dynamic_weights(args_cp)
         self._args = args_cp
         
@@ -152,16 +184,29 @@ class MethodBO(Method):
         y_new: Cost functino evalutations for those parameter points
         """
         #raise Warning('Need to fix dims: can currently only update one at a time')
-        x_new = np.atleast_2d(x_new)
-        y_new = np.atleast_2d(y_new)
+        # no copy if x_new, y_new are already float arrays (views are fine as 
+        # _append_data copies them in the buffers)
+        x_new = np.atleast_2d(np.asarray(x_new, dtype=float))
+        y_new = np.atleast_2d(np.asarray(y_new, dtype=float))
         if not self.evaluated_init:
             self.optimiser.X = x_new
             self.optimiser.Y = y_new
         else:
-            self.optimiser.X = np.vstack((self.optimiser.X, x_new))
-            self.optimiser.Y = np.vstack((self.optimiser.Y, y_new))
+            self._append_data(x_new, y_new)
+            if self._args.get('max_history') is not None:
+                self._trim_data(self._args['max_history'])
         # update
-        self.optimiser._update_model(self.optimiser.normalization_type)                
+        try:
+            self.optimiser._update_model(self.optimiser.normalization_type)                
+        except np.linalg.LinAlgError:
+            # (GPy already retried the Cholesky with increasing jitter)
+            kernel = getattr(self, '_fp32_kernel', None)
+            if kernel is None or not kernel.fp32:
+                raise
+            # if the GPy model was never built GPyOpt falls back on its 
+            # default (float64) kernel
+            kernel.fp32 = False
+            self.optimiser._update_model(self.optimiser.normalization_type)
         if(self._acq_weights_update): 
             self._update_weights(self.optimiser)
         
@@ -173,6 +218,68 @@ class MethodBO(Method):
         # self._best_x = self.optimiser.X[np.argmin(self.optimiser.model.predict(self.optimiser.X, with_noise=False)[0])]
         self.evaluated_init = True
     
+    def _append_data(self, x_new, y_new):
+        """
+        Appends x_new, y_new to the data of the GPyOpt object. The data is 
+        kept in buffers whose size doubles when full (rather than vstack-ing
+        everything at each update), self.optimiser.X/Y are views of the filled
+        part. Buffers are rebuilt if X/Y were replaced from outside
+        """
+        bo = self.optimiser
+        buffers = getattr(self, '_data_buffers', None)
+        if buffers is None or bo.X is not buffers[2] or bo.Y is not buffers[3]:
+            X, Y = np.atleast_2d(bo.X), np.atleast_2d(bo.Y)
+            buffers = (X.copy(), Y.copy(), X, Y)
+        X_buf, Y_buf, _, _ = buffers
+        nb_old, nb_new = len(bo.X), len(x_new)
+        if nb_old + nb_new > len(X_buf):
+            capacity = max(2 * len(X_buf), nb_old + nb_new)
+            X_buf = np.resize(X_buf, (capacity, X_buf.shape[1]))
+            Y_buf = np.resize(Y_buf, (capacity, Y_buf.shape[1]))
+        X_buf[nb_old:nb_old+nb_new] = x_new
+        Y_buf[nb_old:nb_old+nb_new] = y_new
+        bo.X = X_buf[:nb_old+nb_new]
+        bo.Y = Y_buf[:nb_old+nb_new]
+        self._data_buffers = (X_buf, Y_buf, bo.X, bo.Y)
+
+    def _trim_data(self, max_history):
+        """
+        Keeps only the max_history most recent points in the GPyOpt data 
+        (plus the point with the lowest Y, in place of the oldest of those),
+        so the GP fit cost and memory don't grow with the iterations. Done in 
+        place in the data buffers
+        """
+        bo = self.optimiser
+        nb_data = len(bo.X)
+        if nb_data <= max_history:
+            return
+        keep = np.arange(nb_data - max_history, nb_data)
+        best = int(np.argmin(bo.Y[:,0]))
+        if best < keep[0]:
+            keep[0] = best
+        X_buf, Y_buf, _, _ = self._data_buffers
+        X_buf[:max_history] = X_buf[keep]
+        Y_buf[:max_history] = Y_buf[keep]
+        bo.X = X_buf[:max_history]
+        bo.Y = Y_buf[:max_history]
+        self._data_buffers = (X_buf, Y_buf, bo.X, bo.Y)
+
+    def _setup_parallel_acquisition(self, bo_args):
+        """ Swap the acquisition optimizer of the GPyOpt object for a 
+        ParallelAcquisitionOptimizer with bo_args['acquisition_nb_workers'] 
+        threads (and bo_args['optim_num_anchor'] anchor points, default 5)
+        """
+        bo = self.optimiser
+        acq_opt = ParallelAcquisitionOptimizer(bo.space, 
+                                               bo.acquisition_optimizer_type,
+                                               nb_workers = bo_args['acquisition_nb_workers'],
+                                               num_anchor = bo_args.get('optim_num_anchor', 5),
+                                               model = bo.model)
+        bo.acquisition_optimizer = acq_opt
+        bo.acquisition.optimizer = acq_opt
+        if hasattr(bo.evaluator, 'acquisition_optimizer'):
+            bo.evaluator.acquisition_optimizer = acq_opt
+
     def _setup_dynamic_weights(self, bo_args):
         """ building the rules to update the weights of the LCB acquisition 
         function. 
@@ -201,6 +308,162 @@ class MethodBO(Method):
             self._acq_weights_update = False
             self._update_weights = False
         
+def _gen_dist_kernel(nb_params):
+    """
+    Returns a numba function (X, X2) -> matrix of euclidean distances between 
+    the rows of X and X2, with nb_params a compile time constant so that the 
+    loop over the parameters is unrolled. Compiled once per nb_params (the 
+    ansatz sizes are fixed for a whole run), None if numba is not installed
+    """
+    if numba is None:
+        return None
+    kernel = _DIST_KERNELS.get(nb_params)
+    if kernel is None:
+        D = nb_params
+
+        @numba.njit(fastmath=True)
+        def kernel(X, X2):
+            out = np.empty((X.shape[0], X2.shape[0]))
+            for ii in range(X.shape[0]):
+                for jj in range(X2.shape[0]):
+                    acc = 0.
+                    for kk in range(D):
+                        diff = X[ii, kk] - X2[jj, kk]
+                        acc += diff * diff
+                    out[ii, jj] = np.sqrt(acc)
+            return out
+        _DIST_KERNELS[nb_params] = kernel
+    return kernel
+
+class _Float32Distances():
+    """
+    Mixin for GPy stationary kernels computing the pairwise distances (the 
+    O(n^2 nb_params) part of building K, and of each acquisition evaluation 
+    through model.predict) in float32, the kernel values and Cholesky stay in 
+    float64. If numba is installed the distances come from a kernel compiled 
+    for the exact nb_params (see _gen_dist_kernel). MethodBO sets fp32 to 
+    False (back to float64) if the model can't be factorised
+    """
+    fp32 = True
+
+    def _unscaled_dist(self, X, X2=None):
+        if not self.fp32:
+            return super()._unscaled_dist(X, X2)
+        X = np.asarray(X, dtype=np.float32)
+        if X2 is not None:
+            X2 = np.asarray(X2, dtype=np.float32)
+        dist_kernel = _gen_dist_kernel(X.shape[1])
+        if dist_kernel is not None:
+            return dist_kernel(X, X if X2 is None else X2)
+        return super()._unscaled_dist(X, X2).astype(np.float64)
+
+class Matern52f32(_Float32Distances, GPy.kern.Matern52):
+    """ GPy.kern.Matern52 (GPyOpt's default) with float32 distances, used by 
+    MethodBO when its args have 'kernel_fp32':True """
+
+class RBFf32(_Float32Distances, GPy.kern.RBF):
+    """ GPy.kern.RBF with float32 distances (can be passed as bo 'kernel')"""
+
+
+class ParallelAcquisitionOptimizer(gpyopt_acq.AcquisitionOptimizer):
+    """
+    GPyOpt AcquisitionOptimizer running the local optimisations (L-BFGS by 
+    default) from the different anchor points in several threads. GPy models 
+    are not thread safe (they cache kernel computations), so every thread but 
+    the first works on its own deepcopy of the acquisition (and model). The 
+    copies are reused until the model is refitted.
+    Used by MethodBO when its args have 'acquisition_nb_workers'
+    """
+    def __init__(self, space, optimizer='lbfgs', nb_workers=1, 
+                 num_anchor=5, **kwargs):
+        """
+        Parameters
+        ----------
+        space, optimizer, kwargs : 
+            see GPyOpt.optimization.AcquisitionOptimizer
+        nb_workers : int, default 1
+            Number of threads, same conventions as ParallelRunner (negative 
+            to count back from the nb of cpus). Never more than num_anchor
+        num_anchor : int, default 5
+            Number of anchor points (i.e. of local optimisations)
+        """
+        super().__init__(space, optimizer, **kwargs)
+        self.num_anchor = num_anchor
+        self.nb_workers = ParallelRunner._resolve_nb_workers(nb_workers, num_anchor)
+        self._acq_copies = []
+        self._acq_copies_key = None
+
+    @staticmethod
+    def _acq_state_key(acq):
+        """ Changes whenever the GP of acq is refitted (data or 
+        hyperparameters) or one of the acquisition's scalar attributes (e.g. 
+        the exploration weight) is changed """
+        gp = getattr(acq.model, 'model', None)
+        if gp is None:
+            return None
+        scalars = tuple(sorted((k, v) for k, v in vars(acq).items() 
+                               if isinstance(v, (int, float))))
+        return (id(acq), id(gp), gp.X.tobytes(), gp.Y.tobytes(), 
+                gp.param_array.tobytes(), scalars)
+
+    def _get_acq_copies(self, acq, nb_copies):
+        """ Returns nb_copies deepcopies of acq, only made again when the 
+        model or the acquisition changed since the last call """
+        key = self._acq_state_key(acq)
+        if key is None or key != self._acq_copies_key:
+            self._acq_copies = []
+        while len(self._acq_copies) < nb_copies:
+            self._acq_copies.append(copy.deepcopy(acq, memo={id(self):self}))
+        self._acq_copies_key = key
+        return self._acq_copies[:nb_copies]
+
+    def __getstate__(self):
+        """ The acquisition copies are not pickled, they are rebuilt on the 
+        next optimize """
+        state = self.__dict__.copy()
+        state['_acq_copies'] = []
+        state['_acq_copies_key'] = None
+        return state
+
+    def optimize(self, f=None, df=None, f_df=None, duplicate_manager=None):
+        """ Same as AcquisitionOptimizer.optimize, with the anchor points 
+        split among the threads """
+        self.optimizer = gpyopt_acq.choose_optimizer(self.optimizer_name, 
+                                                     self.context_manager.noncontext_bounds)
+        if self.type_anchor_points_logic == gpyopt_acq.max_objective_anchor_points_logic:
+            anchor_points_generator = gpyopt_acq.ObjectiveAnchorPointsGenerator(
+                self.space, gpyopt_acq.random_design_type, f)
+        else:
+            anchor_points_generator = gpyopt_acq.ThompsonSamplingAnchorPointsGenerator(
+                self.space, gpyopt_acq.sobol_design_type, self.model)
+        anchor_points = anchor_points_generator.get(num_anchor=self.num_anchor,
+                                                    duplicate_manager=duplicate_manager, 
+                                                    context_manager=self.context_manager)
+
+        def run_anchors(anchors, f, f_df):
+            return [gpyopt_acq.apply_optimizer(self.optimizer, a, f=f, df=None, f_df=f_df, 
+                                               duplicate_manager=duplicate_manager, 
+                                               context_manager=self.context_manager, 
+                                               space=self.space) 
+                    for a in anchors]
+
+        chunks = [anchor_points[ii::self.nb_workers] for ii in range(self.nb_workers)]
+        chunks = [cc for cc in chunks if len(cc) > 0]
+        acq = getattr(f_df if f_df is not None else f, '__self__', None)
+        if len(chunks) <= 1 or acq is None:
+            optimized_points = run_anchors(anchor_points, f, f_df)
+        else:
+            # copies are made before any thread starts using the original
+            funcs = [(f, f_df)]
+            for acq_cp in self._get_acq_copies(acq, len(chunks) - 1):
+                funcs.append((getattr(acq_cp, f.__name__) if f is not None else None, 
+                              getattr(acq_cp, f_df.__name__) if f_df is not None else None))
+            with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+                futures = [pool.submit(run_anchors, cc, *ff) for cc, ff in zip(chunks, funcs)]
+                optimized_points = [pt for fut in futures for pt in fut.result()]
+        x_min, fx_min = min(optimized_points, key=lambda t:t[1])
+        return x_min, fx_min
+
 class MethodSPSA(Method):
     """ Implementation of the Simultaneous Perturbation Stochastic Algo,
     Implemented to perform minimization (can be extended for maximization)
@@ -221,6 +484,7 @@ class MethodSPSA(Method):
                 't':float
                 'A':float
                 'minimize':True (optional it will behave as True by default)
+                'seed': None or int (optional) seed of the random generator
             typical_args = {'a':1, 'b':0.628, 's':0.602, 't':0.101,'A':0,'domain':[(0,1)]}
         Comments
         ----------
@@ -230,6 +494,7 @@ class MethodSPSA(Method):
         self._type = 'SPSA'
         self._nb_request = 2
         self._updated = True
+        self._rng = np.random.default_rng(args.get('seed'))
         domain = args['domain']
         x_init = args['x_init']
         if domain is None:
@@ -238,9 +503,10 @@ class MethodSPSA(Method):
             x_init = np.atleast_1d(np.squeeze(x_init))
             assert np.ndim(x_init) == 1, "x_init should be a single set of paarmeters"
         else:
-            self._x_min, self._x_max = np.array(domain)[:,0], np.array(domain)[:,1]
+            domain_arr = np.asarray(domain, dtype=float)
+            self._x_min, self._x_max = domain_arr[:,0], domain_arr[:,1]
             if x_init is None:
-                x_init = np.array([np.random.uniform(*d) for d in domain])
+                x_init = self._rng.uniform(self._x_min, self._x_max)
         self.domain = domain
         self.x_init = x_init
         
@@ -267,7 +533,7 @@ class MethodSPSA(Method):
         """ Needs evaluation of 2 points: x_m (x minus some perturbation) and 
         x_p (x plus some perturbation)"""
         b_k = self._beta_schedule(self._iter) # size of the perturbation
-        eps = np.sign(np.random.uniform(0, 1, self.nb_params) - 0.5) # direction of the perturbation
+        eps = np.sign(self._rng.uniform(0, 1, self.nb_params) - 0.5) # direction of the perturbation
         x_last = self._x[-1]
         x_p = np.clip(x_last + b_k * eps, self._x_min, self._x_max)
         x_m = np.clip(x_last - b_k * eps, self._x_min, self._x_max)
@@ -319,6 +585,121 @@ class MethodSPSA(Method):
         else:
             raise IndexError("update X vector must be <= len 2")
 
+class MethodBoTorch(Method):
+    """
+    BO with the GP fit and acquisition maximisation done by BoTorch/GPyTorch
+    (so it can run on a gpu), takes the same args dict as MethodBO. 
+    Minimises the cost using a SingleTaskGP and LogExpectedImprovement (q=1).
+    torch/botorch are only imported when the class is initialized
+    """
+    @property
+    def best_x(self):
+        """ Update and return the best guess for current optimum (min of the 
+        posterior mean over the points evaluated so far)"""
+        if self._model is None:
+            self._best_x = self.X[np.argmin(self.Y)]
+        else:
+            mean = self._model.posterior(self._to_tensor(self.X)).mean
+            self._best_x = self.X[int(mean.argmax())]
+        return self._best_x
+
+    @property
+    def optimiser(self):
+        """ Mirrors MethodBO.optimiser, so that code reading .optimiser.X/.Y 
+        works with both """
+        return self
+
+    def _sub_class_init(self, args):
+        """
+        BoTorch spesific init
+        
+        Parameters
+        ------------------
+        args: dict, same as MethodBO (only 'domain', 'X', 'Y', 
+            'initial_design_numdata' are used) plus the optional keys:
+            'device': torch device, defaults to 'cuda' when available
+            'num_restarts': (default 10) nb of restarts of optimize_acqf
+            'raw_samples': (default 512) nb of samples used to pick the restarts
+            'seed': seed of the random init points
+        """
+        import torch
+        self._torch = torch
+        self._type = 'BO'
+        self._args = args
+        self._device = torch.device(args.get('device', 'cuda' if torch.cuda.is_available() else 'cpu'))
+        self._num_restarts = args.get('num_restarts', 10)
+        self._raw_samples = args.get('raw_samples', 512)
+        self._rng = np.random.default_rng(args.get('seed'))
+        domain = np.array([d['domain'] for d in args['domain']], dtype=float)
+        self._x_min, self._x_max = domain[:,0], domain[:,1]
+        self._bounds = self._to_tensor(domain.T)
+        self._model = None
+        if args['X'] is None:
+            self.evaluated_init = False
+            self._nb_init = args['initial_design_numdata']
+            self.X = np.zeros((0, len(domain)))
+            self.Y = np.zeros((0, 1))
+        else:
+            self.evaluated_init = True
+            self.X = np.atleast_2d(args['X'])
+            self.Y = np.atleast_2d(args['Y'])
+            self._fit_model()
+
+    def _to_tensor(self, arr):
+        """ numpy -> (double) tensor on the working device """
+        return self._torch.as_tensor(arr, dtype=self._torch.double, device=self._device)
+
+    def _fit_model(self):
+        """ Refit a SingleTaskGP to the data (the cost is negated: BoTorch 
+        maximises) """
+        from botorch.models import SingleTaskGP
+        from botorch.models.transforms import Normalize, Standardize
+        from botorch.fit import fit_gpytorch_mll
+        from gpytorch.mlls import ExactMarginalLogLikelihood
+        train_x = self._to_tensor(self.X)
+        train_y = -self._to_tensor(self.Y)
+        model = SingleTaskGP(train_x, train_y, 
+                             input_transform=Normalize(d=train_x.shape[-1], bounds=self._bounds),
+                             outcome_transform=Standardize(m=1))
+        fit_gpytorch_mll(ExactMarginalLogLikelihood(model.likelihood, model))
+        self._model = model
+
+    def next_evaluation_params(self):
+        """
+        Returns the next evaluation points requested by this optimiser
+        """
+        if not self.evaluated_init:
+            return self._rng.uniform(self._x_min, self._x_max, 
+                                     size=(self._nb_init, len(self._x_min)))
+        from botorch.optim import optimize_acqf
+        try:
+            from botorch.acquisition import LogExpectedImprovement as EI
+        except ImportError:
+            from botorch.acquisition import ExpectedImprovement as EI
+        acq = EI(self._model, best_f=self._to_tensor(-self.Y.min()))
+        x_new, _ = optimize_acqf(acq, bounds=self._bounds, q=1, 
+                                 num_restarts=self._num_restarts,
+                                 raw_samples=self._raw_samples)
+        return x_new.detach().cpu().numpy()
+
+    def update(self, x_new, y_new):
+        """
+        Updates the interal state of the optimiser with the data provided
+        
+        Parametres:
+        -------------
+        x_new: Parameter points that were requested/provided
+        y_new: Cost functino evalutations for those parameter points
+        """
+        x_new = np.atleast_2d(x_new)
+        y_new = np.reshape(y_new, (-1, 1))
+        self.X = np.vstack((self.X, x_new))
+        self.Y = np.vstack((self.Y, y_new))
+        self._fit_model()
+        self._iter += x_new.shape[0]
+        self.evaluated_init = True
+
+
 class ParallelRunner():
     """ 
     Class that wraps a set of quantum optimisation tasks. It separates 
@@ -341,7 +722,10 @@ class ParallelRunner():
                  optimizer, # to replace default BO, extend to list? 
                  optimizer_args = None, # also allow list of input args
                  method = 'shared',
-                 share_init = True): 
+                 share_init = True,
+                 nb_workers = None,
+                 seed = None,
+                 init_jobs = 1): 
         """ 
         Parameters
         ----------
@@ -385,9 +769,22 @@ class ParallelRunner():
         init_jobs : int, default 1
             (BO) The number of qiskit jobs to use to generate initial data. 
             (Most real device backends accept up to 900 circuits in one job.)
+            Only used if optimizer_args have initial_design_numdata='max', 
+            which is then replaced by the number of init points that fills 
+            init_jobs jobs
+        nb_workers : int, optional
+            Number of threads used to query/update the internal optimisers 
+            concurrently (GP fits and acquisitions spend most of their time in
+            BLAS which releases the GIL). Defaults to 1, i.e. the optims run 
+            one after the other. Negative values count back from the number 
+            of cpus (-1 = all of them, -2 = all but one, ...), values above 
+            nb_optim are clipped to nb_optim and 0 raises
+        seed : int, optional
+            Seed of the random generator used to make padding points
         """
-        # make (almost certainly) unique id
-        self._prefix = ut.safe_string.gen(5) 
+        # make unique id (fixed width so that it cannot be a substring of 
+        # another prefix when Batch looks for the results of this runner)
+        self._prefix = 'R{:05x}'.format(next(_prefix_counter))
 
         # # check the method arg is recognised
         # if not method in ['independent','shared','left','right']:
@@ -406,11 +803,23 @@ class ParallelRunner():
         self._share_init = share_init
         
         # make internal assets
+        self._nb_meas_circuits = [len(cst.meas_circuits) for cst in cost_objs]
+        optimizer_args = self._resolve_nb_init(optimizer_args, init_jobs)
         self.optim_list = self._gen_optim_list(optimizer, optimizer_args)
+        self._cost_nb_params = [cst.nb_params for cst in self.cost_objs]
+        self._nb_params = self._gen_nb_params()
+        self._nb_workers = self._resolve_nb_workers(nb_workers, len(self.optim_list))
+        self._pool = None
         self._sharing_matrix = self._gen_sharing_matrix()
+        self._diag_tuples, self._pad_tuples = self._gen_pad_tuples()
+        if self._sharing_matrix is not None:
+            self._sharing_groups = self._group_sharing_matrix(self._sharing_matrix)
         self.circs_to_exec = None
-        self._parallel_x = {}
-        self._parallel_id = {}
+        self._parallel_x = np.zeros((0, 0, 0))
+        self._parallel_id = np.zeros((0, 0), dtype=object)
+        self._nb_labels = 0
+        self._bind_cache = collections.OrderedDict()
+        self._rng = np.random.default_rng(seed)
         self._last_results_obj = None
         self._last_x_new = None
         
@@ -452,6 +861,98 @@ class ParallelRunner():
             return [opt(arg) for opt, arg in zip(optim_list, optim_args_list)]
              
 
+    def _resolve_nb_init(self, optimizer_args, init_jobs):
+        """
+        Replace initial_design_numdata='max' in the optimizer args by the 
+        largest number of init points whose circuits fit in init_jobs jobs 
+        (returns copies, the input args are not modified)
+        """
+        if self._share_init:
+            # only the first optim requests init points
+            nb_circs_per_point = self._nb_meas_circuits[0]
+        else:
+            nb_circs_per_point = sum(self._nb_meas_circuits)
+        nb_init = max(1, init_jobs * MAX_CIRCUITS_PER_JOB // nb_circs_per_point)
+
+        def _resolve(args):
+            if type(args) == dict and args.get('initial_design_numdata') == 'max':
+                args = dict(args)
+                args['initial_design_numdata'] = nb_init
+            return args
+        if type(optimizer_args) == list:
+            return [_resolve(args) for args in optimizer_args]
+        return _resolve(optimizer_args)
+
+
+    def _gen_nb_params(self):
+        """
+        Number of parameters shared by all the cost objs (None if they differ)
+        """
+        nb_params = set(self._cost_nb_params)
+        if len(nb_params) == 1:
+            return nb_params.pop()
+        return None
+
+
+    @staticmethod
+    def _resolve_nb_workers(nb_workers, nb_optim):
+        """
+        Turns the nb_workers arg into an actual number of threads in 
+        [1, nb_optim] (see __init__ for the conventions)
+        """
+        nb_cpus = os.cpu_count() or 1
+        if nb_workers is None:
+            nb_workers = 1
+        elif nb_workers == 0:
+            raise ValueError('nb_workers cannot be 0, use 1 to run the optims serially')
+        elif nb_workers < 0:
+            nb_workers = max(nb_cpus + 1 + nb_workers, 1)
+        return int(min(nb_workers, max(nb_optim, 1)))
+
+    def _map_optims(self, func, *iterables):
+        """
+        Same as list(map(func, *iterables)) but spread over self._nb_workers 
+        threads, func should only touch one optimiser per call
+        """
+        if self._nb_workers <= 1:
+            return list(map(func, *iterables))
+        # one pool per runner, made on first use (getattr for runners 
+        # pickled before the attribute existed)
+        if getattr(self, '_pool', None) is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._nb_workers)
+        return list(self._pool.map(func, *iterables))
+
+    def __getstate__(self):
+        """ Thread pools can't be pickled, a copy makes its own when needed """
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+
+    def _gen_next_evaluation_params(self):
+        """
+        Query the internal optimisers for their next points. When all requests
+        have the same number of points they are written into a single 
+        preallocated (nb_optim, nb_points, nb_params) array. The number of 
+        points is taken from what the optimisers returned (e.g. before init
+        MethodBO returns its nb_init initial design points, not _nb_request)
+        """
+        x_list = self._map_optims(lambda opt: opt.next_evaluation_params(), self.optim_list)
+        if self._nb_params is None:
+            return x_list
+        sizes = set(np.size(x) for x in x_list)
+        if len(sizes) != 1:
+            return x_list
+        size = sizes.pop()
+        if size == 0 or size % self._nb_params != 0:
+            return x_list
+        shape = (size // self._nb_params, self._nb_params)
+        x_new = np.empty((len(self.optim_list),) + shape)
+        for ii, x in enumerate(x_list):
+            x_new[ii] = np.reshape(x, shape)
+        return x_new
+    
+
     def _gen_sharing_matrix(self):
         """ 
         Generate the sharing tuples based on sharing mode
@@ -462,48 +963,30 @@ class ParallelRunner():
         elif self.method == 'independent':
             #return [(ii, ii, ii) for ii in range(nb_optim)]
             return [(ii, ii, jj) for ii, opt in enumerate(self.optim_list) for jj in range(opt._nb_request)]
-        elif self.method == 'left':
-            tuples = []
-            for consumer_idx in range(nb_optim):
-                for generator_idx in range(nb_optim):
-                    if consumer_idx >= generator_idx:
-                        # higher indexed optims consume the evaluations generated by
-                        # lower indexed optims
-                        tuples.append((consumer_idx,generator_idx,generator_idx))
-                    else:
-                        # lower indexed optims generate extra 'padding' evaluations so
-                        # that they recieve the same number of new data points
-                        tuples.append((consumer_idx,consumer_idx,generator_idx))
-            # sanity check
-            assert len(tuples)==nb_optim*nb_optim
-            return tuples
-        elif self.method == 'right':
-            tuples = []
-            for consumer_idx in range(nb_optim):
-                for generator_idx in range(nb_optim):
-                    if consumer_idx <= generator_idx:
-                        # higher indexed optims consume the evaluations generated by
-                        # lower indexed optims
-                        tuples.append((consumer_idx,generator_idx,generator_idx))
-                    else:
-                        # lower indexed optims generate extra 'padding' evaluations so
-                        # that they recieve the same number of new data points
-                        tuples.append((consumer_idx,consumer_idx,generator_idx))
-            # sanity check
-            assert len(tuples)==nb_optim*nb_optim
-            return tuples
+        elif self.method in ['left', 'right']:
+            # all (consumer, generator) pairs, in the order consumer-major
+            consumer_idx, generator_idx = np.divmod(np.arange(nb_optim*nb_optim), nb_optim)
+            if self.method == 'left':
+                # higher indexed optims consume the evaluations generated by
+                # lower indexed optims
+                consumes = (consumer_idx >= generator_idx)
+            else:
+                # lower indexed optims consume the evaluations generated by
+                # higher indexed optims
+                consumes = (consumer_idx <= generator_idx)
+            # the others generate extra 'padding' evaluations so that they 
+            # recieve the same number of new data points
+            requester_idx = np.where(consumes, generator_idx, consumer_idx)
+            return self._to_tuples(consumer_idx, requester_idx, generator_idx)
         
         elif 'NN' in self.method:
             if self.method == 'NN':
                 neighbours = 1
             else:
                 neighbours = int(self.method[2:])
-            all_to_all = [(ii, jj, jj) for ii in range(nb_optim) for jj in range(nb_optim)]
-            NN = []
-            for consumer, requester, idx in all_to_all:
-                if abs(consumer - requester) <= neighbours:
-                    NN.append((consumer, requester, idx))
-            return NN
+            consumer_idx, requester_idx = np.divmod(np.arange(nb_optim*nb_optim), nb_optim)
+            mask = np.abs(consumer_idx - requester_idx) <= neighbours
+            return self._to_tuples(consumer_idx[mask], requester_idx[mask], requester_idx[mask])
         
         elif '2d' in self.method:
             if self.method == '2d':
@@ -515,16 +998,13 @@ class ParallelRunner():
             else:
                 square = int(np.sqrt(nb_optim))
             
-            all_to_all = [(ii, jj, jj) for ii in range(nb_optim) for jj in range(nb_optim)]
-            NN = []
-            grid = np.arange(nb_optim).reshape(square, square)
-            for consumer, requester, idx in all_to_all:
-                req_crood = np.squeeze(np.where(grid == requester))
-                cons_coord = np.squeeze(np.where(grid == consumer))
-                dist = np.linalg.norm(req_crood - cons_coord)
-                if dist <= neighbours:
-                    NN.append((consumer, requester, idx))
-            return NN
+            consumer_idx, requester_idx = np.divmod(np.arange(nb_optim*nb_optim), nb_optim)
+            # (row, col) coordinates of the optims on the square grid
+            cons_coord = np.stack(np.divmod(consumer_idx, square), axis=1)
+            req_coord = np.stack(np.divmod(requester_idx, square), axis=1)
+            dist = np.linalg.norm(req_coord - cons_coord, axis=1)
+            mask = dist <= neighbours
+            return self._to_tuples(consumer_idx[mask], requester_idx[mask], requester_idx[mask])
         
         elif 'independent_plus_random_' in self.method:
             print('This parallelRunner.method assumes domain is [0, 2pi) for each param, for each optim')
@@ -533,6 +1013,34 @@ class ParallelRunner():
             return [(ii, ii, jj) for ii, opt in enumerate(self.optim_list) for jj in range(n_points)]
          
 
+    @staticmethod
+    def _to_tuples(consumer_idx, requester_idx, pt_idx):
+        """ Zips index arrays into a list of (consumer, requester, pt) int tuples"""
+        return list(zip(np.asarray(consumer_idx).tolist(), 
+                        np.asarray(requester_idx).tolist(), 
+                        np.asarray(pt_idx).tolist()))
+
+
+    def _gen_pad_tuples(self):
+        """
+        Split the self-evaluations of the sharing matrix in the ones of the 
+        points requested by the optims (requester_idx==pt_idx) and the ones 
+        that need a padding point (requester_idx!=pt_idx)
+
+        Returns
+        -------
+        diag_tuples : 1d array of requester_idx
+        pad_tuples : tuple of two 1d arrays (requester_idx, pt_idx)
+        """
+        if self._sharing_matrix is None or len(self._sharing_matrix) == 0:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, (empty, empty)
+        consumer, requester, pt = np.array(self._sharing_matrix, dtype=np.int32).T
+        own = (consumer == requester)
+        diag = own & (requester == pt)
+        pad = own & (requester != pt)
+        return requester[diag], (requester[pad], pt[pad])
+
     def _gen_padding_params(self, x_new):
         """
         Different sharing modes e.g. 'left' and 'right' require padding
@@ -540,18 +1048,6 @@ class ParallelRunner():
         points, generate those circuits here
         """
 
-        def _find_min_dist(a,b):
-            """
-            distance is euclidean distance, but since the values are angles we want to
-            minimize the (element-wise) differences over optionally shifting one of the
-            points by ±2\pi
-            """
-            a = np.array(a)
-            b = np.array(b)
-            disp_vector = np.minimum((a-b)**2,((a+2*np.pi)-b)**2)
-            disp_vector = np.minimum(disp_vector,((a-2*np.pi)-b)**2)
-            return np.sqrt(np.sum(disp_vector))
-        
         if 'independent_plus_random_' in self.method:
             n_points = int(self.method.split('_')[-1])
             x_new_mat = [[None for ii in range(n_points)] for jj in range(len(self.cost_objs))]
@@ -559,45 +1055,36 @@ class ParallelRunner():
                 if (consumer_idx==requester_idx) and (pt_idx==0):
                     x_new_mat[requester_idx][0] = x_new[requester_idx][0]
                 elif (consumer_idx==requester_idx):
-                    nb_params = self.cost_objs[consumer_idx].nb_params
-                    x_new_mat[requester_idx][pt_idx] = 2*pi*np.random.rand(nb_params)
+                    nb_params = self._cost_nb_params[consumer_idx]
+                    x_new_mat[requester_idx][pt_idx] = self._rng.uniform(0, TWO_PI, nb_params)
             return x_new_mat
             
 
         x_new_mat = [[None for ii in range(len(self.cost_objs))] for jj in range(len(self.cost_objs))]
-        for consumer_idx,requester_idx,pt_idx in self._sharing_matrix:
-            # print(consumer_idx, requester_idx, pt_idx)
-            # case where we need to generate a new evaluation
-            if (consumer_idx==requester_idx) and (requester_idx==pt_idx):
-                x_new_mat[requester_idx][pt_idx] = x_new[requester_idx][0]
-            if (consumer_idx==requester_idx) and not (requester_idx==pt_idx):
-                # get the points that the two optimsers indexed by
-                # (`consumer_idx`==`requester_idx`) and `pt_idx` chose for their evals
-                
-                # Replaced by Kiran
-                # generator_pt = self._parallel_x[requester_idx,requester_idx]
-                # pt = self._parallel_x[pt_idx,pt_idx]
-                generator_pt = x_new[requester_idx][0]
-                pt = x_new[pt_idx][0]
-                # separation between the points
-                dist = _find_min_dist(generator_pt,pt)
-                
-                # generate random vector in N-d space then scale it to have length we want, 
-                # using 'Hypersphere Point Picking' Gaussian approach
-                random_displacement = np.random.normal(size=self.cost_objs[requester_idx].ansatz.nb_params)
-                random_displacement = random_displacement * dist/np.sqrt(np.sum(random_displacement**2))
-                # element-wise modulo 2\pi
-                new_pt = np.mod(generator_pt+random_displacement,2*np.pi)
-                x_new_mat[requester_idx][pt_idx] = new_pt
-                
-                # make new circuit now done in gen_circ_from_params
-                # this_id = ut.gen_random_str(8)
-                # named_circs = ut.prefix_to_names(self.cost_objs[requester_idx].meas_circuits, 
-                #     this_id)
-                # circs_to_exec += cost.bind_params(named_circs, new_pt, 
-                #     self.cost_objs[requester_idx].ansatz.params)
-                # self._parallel_id[requester_idx,pt_idx] = this_id
-                # self._parallel_x[requester_idx,pt_idx] = new_pt
+        for requester_idx in self._diag_tuples:
+            x_new_mat[requester_idx][requester_idx] = x_new[requester_idx][0]
+        requester_idx, pt_idx = self._pad_tuples
+        if len(requester_idx) == 0:
+            return x_new_mat
+        # case where we need to generate new evaluations: get the points that 
+        # the two optimsers indexed by (`consumer_idx`==`requester_idx`) and 
+        # `pt_idx` chose for their evals (one row per padding point)
+        generator_pts = np.array([x_new[ii][0] for ii in requester_idx])
+        pts = np.array([x_new[ii][0] for ii in pt_idx])
+        # separation between the points: euclidean distance, but since the 
+        # values are angles minimize the element-wise differences modulo 2\pi
+        diff = np.mod(generator_pts - pts, TWO_PI)
+        diff = np.minimum(diff, TWO_PI - diff)
+        dist = np.sqrt(np.sum(diff**2, axis=1))
+        
+        # generate random vectors in N-d space then scale them to have length we
+        # want, using 'Hypersphere Point Picking' Gaussian approach
+        random_displacement = self._rng.standard_normal(generator_pts.shape)
+        random_displacement *= (dist / np.linalg.norm(random_displacement, axis=1))[:,np.newaxis]
+        # element-wise modulo 2\pi
+        new_pts = np.mod(generator_pts + random_displacement, TWO_PI)
+        for req, pt, new_pt in zip(requester_idx, pt_idx, new_pts):
+            x_new_mat[req][pt] = new_pt
         return x_new_mat
 
 
@@ -629,7 +1116,7 @@ class ParallelRunner():
             point_idx = optim_requester_idx
         circ_name = self._parallel_id[optim_requester_idx,point_idx]
         cost_obj = self.cost_objs[cst_eval_idx]
-        x = self._parallel_x[optim_requester_idx,point_idx]
+        x = self._parallel_x[optim_requester_idx,point_idx,:self._cost_nb_params[cst_eval_idx]]
         y = cost_obj.evaluate_cost(results_obj, name = circ_name)
         #print(f'{cst_eval_idx}'+' '+f'{optim_requester_idx}'+' '+f'{point_idx}'+':'+f'{circ_name}')
         #print('x : '+f'{x}')
@@ -657,16 +1144,18 @@ class ParallelRunner():
         
         if inplace:
             self._last_x_new = x_new
-            self._parallel_id = {}
-            self._parallel_x = {}
+            self._reset_parallel_store(x_new)
 
         for cst_idx, (cst, points) in enumerate(zip(cost_list, x_new)):
-            for pt_idx, pt in enumerate(points):
-                if pt is not None:
-                    label = ut.safe_string.gen(4)
-                    circs_to_exec += cst.bind_params_to_meas(pt, label)
-                    self._parallel_x[cst_idx,pt_idx] = pt
-                    self._parallel_id[cst_idx,pt_idx] = label
+            pt_idx = [ii for ii, pt in enumerate(points) if pt is not None]
+            pts = [points[ii] for ii in pt_idx]
+            labels = [self._gen_label() for _ in pt_idx]
+            circs_to_exec += self._bind_cached(cst_idx, pts, labels)
+            if inplace:
+                for ii, pt, label in zip(pt_idx, pts, labels):
+                    # (shorter points if the costs have different nb_params)
+                    self._parallel_x[cst_idx,ii,:len(pt)] = pt
+                    self._parallel_id[cst_idx,ii] = label
             # idx_points = [ut.safe_string.gen(4) for _ in points]                    
             # circs_to_exec += cst.bind_params_to_meas(points, idx_points)
             # self._parallel_x.update({(cst_idx,pt_idx):pt for pt_idx, pt in enumerate(points) })
@@ -676,6 +1165,79 @@ class ParallelRunner():
         return circs_to_exec        
 
 
+    def _reset_parallel_store(self, x_new):
+        """
+        Make self._parallel_x (nb_cost, nb_points, nb_params) and 
+        self._parallel_id (nb_cost, nb_points) empty (NaN / None) arrays large 
+        enough for the points in x_new, only reallocating if the shape changed.
+        If the costs have different nb_params the last axis is the largest 
+        one, and points of cost ii only fill its first _cost_nb_params[ii] 
+        entries
+        """
+        nb_points = max([len(points) for points in x_new], default=0)
+        nb_params = self._nb_params
+        if nb_params is None:
+            nb_params = max([len(pt) for points in x_new for pt in points 
+                             if pt is not None], default=0)
+        shape = (len(x_new), nb_points, nb_params)
+        if self._parallel_x.shape == shape:
+            self._parallel_x.fill(np.nan)
+            self._parallel_id.fill(None)
+        else:
+            self._parallel_x = np.full(shape, np.nan)
+            self._parallel_id = np.full(shape[:2], None, dtype=object)
+
+
+    def _bind_cached(self, cst_idx, points, labels):
+        """
+        Bind each of points to the measurement circuits of cost cst_idx, 
+        naming them with the matching label (circuits are returned point by 
+        point). Points not bound recently are bound together in a single call,
+        the others (e.g. repeated points of shot_noise) are served from a LRU 
+        cache, only renaming a copy of the circuits
+        """
+        cst = self.cost_objs[cst_idx]
+        if (getattr(cst, '_subsample_size', None) is not None
+            or 'bind_params_to_meas' in cst.__dict__):
+            # circuits change on each call, nothing to reuse (or a sum of 
+            # costs, whose circuits are not ordered point by point)
+            return [cc for pt, label in zip(points, labels) 
+                    for cc in cst.bind_params_to_meas(pt, label)]
+        keys = [(cst_idx, tuple(np.round(pt, 10))) for pt in points]
+        missing = {}
+        for key, pt, label in zip(keys, points, labels):
+            if key not in self._bind_cache and key not in missing:
+                missing[key] = (pt, label)
+        if len(missing) > 0:
+            new_pts, new_labels = zip(*missing.values())
+            bound_circs = cst.bind_params_to_meas(np.array(new_pts), list(new_labels))
+            nb_circs = len(bound_circs) // len(missing)
+            for jj, (key, label) in enumerate(zip(missing, new_labels)):
+                self._bind_cache[key] = (label, bound_circs[jj*nb_circs:(jj+1)*nb_circs])
+        circs = []
+        for key, label in zip(keys, labels):
+            self._bind_cache.move_to_end(key)
+            old_label, bound_circs = self._bind_cache[key]
+            if old_label == label:
+                circs += bound_circs
+            else:
+                circs += [cc.copy(name=label + cc.name[len(old_label):]) for cc in bound_circs]
+        while len(self._bind_cache) > BIND_CACHE_SIZE:
+            self._bind_cache.popitem(last=False)
+        return circs
+
+
+    def _gen_label(self):
+        """
+        Returns a new label for the circuits of one parameter point. Labels are
+        unique within this runner (the Batch prefix separates runners) and of 
+        fixed width so none can be a substring of another one
+        """
+        label = 'p{:07x}'.format(self._nb_labels)
+        self._nb_labels += 1
+        return label
+
+
     def _results_from_last_x(self):
         """
         If specific points were requested, then this returns an array of the same 
@@ -683,10 +1245,9 @@ class ParallelRunner():
         """
         results = []
         for cst_idx,cst in enumerate(self.cost_objs):
-            sub_results = []
-            for pt in range(len(self._last_x_new[cst_idx])):
-                sub_results.append(self._cross_evaluation(cst_idx,cst_idx,pt)[1])
-            results.append(sub_results)
+            names = [self._parallel_id[cst_idx,pt] 
+                     for pt in range(len(self._last_x_new[cst_idx]))]
+            results.append(cst.evaluate_cost_batch(self._last_results_obj, names))
         return results
                
     
@@ -701,6 +1262,7 @@ class ParallelRunner():
         """
         if self._evaluated_init:
             raise Exception("Optimizers have already been initialized")
+        self._best_x_matrix = None
         if results_obj == None:
             results_obj = self._last_results_obj
         self._last_results_obj = results_obj
@@ -726,10 +1288,8 @@ class ParallelRunner():
             An iterable with exactly 1 param point per cost function, if None
             is passed the function will query the internal optimisers
         """
-        self._parallel_id = {}
-        self._parallel_x = {}
         if self._evaluated_init:
-            x_new = [opt.next_evaluation_params() for opt in self.optim_list]
+            x_new = self._gen_next_evaluation_params()
             if 'SPSA' not in [o._type for o in self.optim_list]:
                 x_new = self._gen_padding_params(x_new)
         else:
@@ -737,7 +1297,7 @@ class ParallelRunner():
                 # if init data is shared only get requests from first optim
                 x_new = [self.optim_list[0].next_evaluation_params()]
             else:
-                x_new = [opt.next_evaluation_params() for opt in self.optim_list]
+                x_new = self._gen_next_evaluation_params()
         circs_to_exec = self._gen_circuits_from_params(x_new, inplace = True)
         
         # sanity check on number of circuits generated
@@ -767,36 +1327,59 @@ class ParallelRunner():
         results_obj : Qiskit results obj
             The experiment results to use
         """
+        self._best_x_matrix = None
         if results_obj == None:
             results_obj = self._last_results_obj
         else:
             self._last_results_obj = results_obj
-        if sharing_matrix == None:
-            sharing_matrix = self._sharing_matrix
-        
-        for idx,(evl,req,par) in enumerate(sharing_matrix):
-            x, y = self._cross_evaluation(evl, req, par)
-            if idx==0:
-                # initialisation
-                prev_evl = evl
-                x_stack = np.atleast_2d(x)
-                y_stack = np.atleast_2d(y)
-            else:
-                if evl==prev_evl:
-                    x_stack = np.vstack((x_stack,x))
-                    y_stack = np.vstack((y_stack,y))
-                else:
-                    self.optim_list[prev_evl].update(x_stack, y_stack)
-                    prev_evl = evl
-                    x_stack = np.atleast_2d(x)
-                    y_stack = np.atleast_2d(y)
+        if sharing_matrix is None:
+            sharing_groups = self._sharing_groups
+        else:
+            sharing_groups = self._group_sharing_matrix(sharing_matrix)
+        
+        # evaluate all the points shared with an optim in one call to its cost
+        updates = []
+        for evl, reqs, pars in sharing_groups:
+            names = list(self._parallel_id[reqs, pars])
+            y_list = self.cost_objs[evl].evaluate_cost_batch(results_obj, names)
+            x_stack = self._parallel_x[reqs, pars, :self._cost_nb_params[evl]]
+            updates.append((evl, x_stack, np.vstack(y_list)))
         # Add a filter            
         # y_stack = y_stack[y_stack>0.95 min(y_stack)]
         # x_stack = x_stack[y_stack>0.95 min(y_stack)]
-        # clean-up (if this isn't here the last optim won't ever get updated)
-        self.optim_list[prev_evl].update(x_stack, y_stack)
+
+        def _update_one(upd):
+            evl, x_stack, y_stack = upd
+            self.optim_list[evl].update(x_stack, y_stack)
+        if len(set(upd[0] for upd in updates)) == len(updates):
+            self._map_optims(_update_one, updates)
+        else:
+            # an optim is updated several times, keep the order
+            for upd in updates:
+                _update_one(upd)
 
     
+    @staticmethod
+    def _group_sharing_matrix(sharing_matrix):
+        """
+        Groups consecutive tuples of the sharing matrix with the same 
+        evaluating optim
+
+        Returns
+        -------
+        groups : list of (evl, reqs, pars) 
+            with reqs and pars int arrays of the requester and point indices
+        """
+        groups = []
+        for evl, req, par in sharing_matrix:
+            if len(groups) == 0 or groups[-1][0] != evl:
+                groups.append((evl, [], []))
+            groups[-1][1].append(req)
+            groups[-1][2].append(par)
+        return [(evl, np.array(reqs, dtype=int), np.array(pars, dtype=int)) 
+                for evl, reqs, pars in groups]
+
+
     def shot_noise(self, x_new, nb_trials = 8):
         """
         Calculates shot noise for each circuit for a single input parameter
@@ -812,7 +1395,7 @@ class ParallelRunner():
             The number of time the cost function is evaluated for the given point
         """
         if hasattr(x_new[0], '__iter__'):
-            x_new = np.array([x_new] * nb_trials).transpose((1,0,2))
+            x_new = np.repeat(np.asarray(x_new)[:,np.newaxis,:], nb_trials, axis=1)
         else:
             x_new = [x_new] * nb_trials
             x_new = [x_new] * len(self.cost_objs)
@@ -825,6 +1408,16 @@ class ParallelRunner():
         """ Special name for each instance"""
         return self._prefix
 
+    @property
+    def best_x_matrix(self):
+        """ best_x of all the optimisers as a (nb_optim, nb_params) array, 
+        only recomputed after init_optimisers/update (so if the optimisers 
+        are updated directly use opt.best_x instead)"""
+        if getattr(self, '_best_x_matrix', None) is None:
+            self._best_x_matrix = np.stack([np.ravel(opt.best_x) 
+                                            for opt in self.optim_list])
+        return self._best_x_matrix
+
 
 def check_cost_objs_consistency(cost_objs):
     """
@@ -847,35 +1440,28 @@ def check_cost_objs_consistency(cost_objs):
 
     new_cost_objs = []
     for idx,op in enumerate(cost_objs):
+        pauli_set = frozenset(p[1] for p in op.paulis)
 
         if idx == 0:
-            test_pauli_set = set([ p[1] for p in op.paulis ])
+            test_pauli_set = pauli_set
             num_qubits = op.num_qubits  
         else:
             assert op.num_qubits==num_qubits, ("Cost operators passed to"
                 +" do not all have the same number of qubits.")
 
-            if not len(op.paulis)==len(test_pauli_set):
-                # the new qubit op has a different number of Paulis than the previous
-                new_pauli_set = set([ p[1] for p in op.paulis ])
-                if len(op.paulis)>len(test_pauli_set):
-                    # the new operator set has more paulis the previous
-                    missing_paulis = list(new_pauli_set - test_pauli_set)
-                    paulis_to_add = [ [op.atol*10,p] for p in missing_paulis ]
-                    wpo_to_add = wpo(paulis_to_add)
+            if not pauli_set==test_pauli_set:
+                missing_in_new = test_pauli_set - pauli_set
+                missing_in_ref = pauli_set - test_pauli_set
+                if len(missing_in_new) > 0:
+                    # add the paulis of the previous ops to current qubit op
+                    op.add(cost.wpo([ [op.atol*10,p] for p in missing_in_new ]))
+                if len(missing_in_ref) > 0:
                     # iterate over previous qubit ops and add new paulis
-                    for prev_op in qubit_ops:
+                    wpo_to_add = cost.wpo([ [op.atol*10,p] for p in missing_in_ref ])
+                    for prev_op in new_cost_objs:
                         prev_op.add(wpo_to_add)
                     # save new reference pauli set
-                    test_pauli_set = new_pauli_set
-                else:
-                    # the new operator set has less paulis than the previous
-                    missing_paulis = list(test_pauli_set - new_pauli_set)
-                    paulis_to_add = [ [op.atol*10,p] for p in missing_paulis ]
-                    wpo_to_add = wpo(paulis_to_add)
-                    # add new paulis to current qubit op
-                    op.add(wpo_to_add)
-
+                    test_pauli_set = test_pauli_set | missing_in_ref
 
         new_cost_objs.append(op)
 
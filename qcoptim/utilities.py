@@ -18,9 +18,11 @@ __all__ = [
     # Backend utilities
     'BackendManager',
     'Batch',
+    'MultiplexedInstance',
     'SafeString',
     # safe string instance
     'safe_string',
+    'transpile_cached',
     # BO related utilities
     'add_path_GPyOpt',
     'get_path_GPyOpt',
@@ -42,14 +44,20 @@ __all__ = [
     'get_TFIM_qubit_op',
     'get_KH1_qubit_op',
     'get_KH2_qubit_op',
-    'enforce_qubit_op_consistency'
+    'get_H_chain_qubit_op_batch',
+    'enforce_qubit_op_consistency',
+    'ground_state_energies'
 ]
 import pdb
 import dill
 import string
 import random
 import copy
+import hashlib
+import threading
+import collections
 import os, socket, sys
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import qiskit as qk
@@ -70,6 +78,8 @@ pi = np.pi
 
 NB_SHOTS_DEFAULT = 256
 OPTIMIZATION_LEVEL_DEFAULT = 1
+# max number of transpiled circuits kept by transpile_cached
+TRANSPILE_CACHE_SIZE = 256
 FULL_LIST_DEVICES = ['ibmq_rochester', 'ibmq_paris', 'ibmq_toronto', 'ibmq_manhattan',
             'ibmq_qasm_simulator'] # '', ibmq_poughkeepsie
 # There may be more free devices
@@ -154,8 +164,14 @@ class BackendManager():
                      initial_layout=None,
                      seed_transpiler=None,
                      measurement_error_mitigation_cls=None,
+                     sabre=False,
                      **kwargs):
         """ Generate an instance from the current backend
+        sabre: if True the circuits are transpiled with qiskit's preset pass 
+            manager of level optim_lvl using SABRE layout (ignored if an 
+            initial_layout is given) and SABRE routing. Circuits transpiled by 
+            the cost objs are then cached (see transpile_cached), so the 
+            routing is only done once per ansatz
         Not sure this is needed here: 
             + maybe building an instance should be decided in the main_script
             + maybe it should be done in the cost function
@@ -172,6 +188,9 @@ class BackendManager():
             nb_qubits = len(initial_layout)
             logical_qubits = qk.QuantumRegister(nb_qubits, 'logicals')  
             initial_layout = {logical_qubits[ii]:initial_layout[ii] for ii in range(nb_qubits)}
+        if sabre:
+            kwargs['pass_manager'] = self._gen_sabre_pass_manager(optim_lvl, 
+                                                initial_layout, seed_transpiler)
         instance = qk.aqua.QuantumInstance(self.current_backend, shots=nb_shots,
                             optimization_level=optim_lvl, noise_model= noise_model,
                             initial_layout=initial_layout,
@@ -182,6 +201,30 @@ class BackendManager():
         print('Generated a new quantum instance')
         return instance
 
+    def _gen_sabre_pass_manager(self, optim_lvl, initial_layout=None, 
+                                seed_transpiler=None):
+        """ Preset pass manager of level optim_lvl for the current backend, 
+        with SABRE layout and routing """
+        from qiskit.transpiler import PassManagerConfig, CouplingMap, Layout
+        from qiskit.transpiler import preset_passmanagers
+        backend = self.current_backend
+        config = backend.configuration()
+        coupling_map = getattr(config, 'coupling_map', None)
+        if coupling_map is not None:
+            coupling_map = CouplingMap(coupling_map)
+        if type(initial_layout) == dict:
+            initial_layout = Layout(initial_layout)
+        properties = backend.properties() if hasattr(backend, 'properties') else None
+        pm_config = PassManagerConfig(initial_layout=initial_layout,
+                                      basis_gates=config.basis_gates,
+                                      coupling_map=coupling_map,
+                                      layout_method='sabre',
+                                      routing_method='sabre',
+                                      backend_properties=properties,
+                                      seed_transpiler=seed_transpiler)
+        level_pm = getattr(preset_passmanagers, 'level_{}_pass_manager'.format(optim_lvl))
+        return level_pm(pm_config)
+
     def gen_noise_model_from_backend(self, name_backend='ibmq_essex', 
                                      readout_error=True, gate_error=True):
         """ Given a backend name (or int) return the noise model associated"""
@@ -195,13 +238,24 @@ class BackendManager():
 
 
 
+_JOB_EXECUTOR = None
+def _get_job_executor():
+    """ Single worker thread shared by all Batch objects for non-blocking
+    execute calls, created on first use """
+    global _JOB_EXECUTOR
+    if _JOB_EXECUTOR is None:
+        _JOB_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+    return _JOB_EXECUTOR
+
+
 class Batch():
     """ New class that batches circuits together for a single execute.
         MERGE: assumes optim class has .prefix (can be hashed random string)
         + Init with instatnce where all circits will be run on 
         + Use submit, to build up list of meas circs,
-        + Use execute to send all the jobs to the imbq device
-        + Use result to recall the results relevant to different experiments in the batch"""
+        + Use execute to send all the jobs to the imbq device (as one job)
+        + Use result to recall the results relevant to different experiments in the batch
+          (found from the position of each submission in the job)"""
     def __init__(self, instance = None):
         """
         Parameters
@@ -210,6 +264,10 @@ class Batch():
         self.circ_list = []
         self._last_circ_list = None
         self._last_results_obj = None
+        self._pending = None
+        # name -> position of its circuits in circ_list (and in the results)
+        self._slices = {}
+        self._last_slices = {}
         if instance == None:
             backend = qk.providers.aer.QasmSimulator()
             self.instance = qk.aqua.QuantumInstance(backend, shots=256)
@@ -232,28 +290,54 @@ class Batch():
             name is provided by the ParallelRunner object if none is provided"""
         if hasattr(obj_in, '__iter__'):
             assert name != None, " If input is a list of circuits, please provide a name"
-            obj_in = list(obj_in)
-            circ_list = copy.deepcopy(obj_in)
+            circ_list = list(obj_in)
         else:  # assume input was object
             name = obj_in.prefix
-            circ_list = copy.deepcopy(obj_in.circs_to_exec)
+            circ_list = obj_in.circs_to_exec
         if name in self._known_optims:
             raise AttributeError("Currently has submitted circuits of same name - please rename")
-        for circ in circ_list:
-            circ.name = name + circ.name
-        self.circ_list += circ_list
+        # QuantumCircuit.copy only copies the instruction list, enough to rename
+        start = len(self.circ_list)
+        self.circ_list += [circ.copy(name=name + circ.name) for circ in circ_list]
+        self._slices[name] = slice(start, len(self.circ_list))
         self._known_optims += [name]
     
-    def execute(self):
+    def execute(self, block = True):
         """
-        Use the instance provided to submit a single job list to"""
-        results = self.instance.execute(self.circ_list, had_transpiled=True)
-        self._last_results_obj = results
-        self._last_circ_list = self.circ_list
+        Use the instance provided to submit a single job list to
+        
+        Parameters
+        ----------
+        block : boolean, default True
+            If False the job is run in a background thread and a 
+            concurrent.futures.Future is returned straight away, so client side
+            work (e.g. updating/fitting other runners) can overlap with the 
+            queue/execution time. The next call to .result waits on it. 
+            Background jobs from all Batch objects are run one at a time, in 
+            the order they were executed (QuantumInstance isn't thread safe)
+        """
+        circ_list = self.circ_list
+        self._last_circ_list = circ_list
+        self._last_slices = self._slices
         self.circ_list = []
+        self._slices = {}
         self._known_optims = []
+        if not block:
+            self._last_results_obj = None
+            self._pending = _get_job_executor().submit(
+                self.instance.execute, circ_list, had_transpiled=True)
+            return self._pending
+        self._pending = None
+        results = self.instance.execute(circ_list, had_transpiled=True)
+        self._last_results_obj = results
         return results
     
+    def _wait(self):
+        """ Block until a job started with execute(block=False) is done """
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._last_results_obj = pending.result()
+    
     def result(self, obj_in):
         """
         Returns a results object as though it was generated by executing the list of circuits. 
@@ -266,15 +350,24 @@ class Batch():
             name = obj_in
         else:
             name = obj_in.prefix
-        results_di = self._last_results_obj.to_dict()
+        self._wait()
+        all_results = self._last_results_obj.results
+        experiments = all_results[self._last_slices.get(name, slice(0))]
+        if not (len(experiments) > 0 
+                and name in experiments[0].header.name 
+                and name in experiments[-1].header.name):
+            # results not in the order the circuits were submitted, look them up
+            experiments = [exp for exp in all_results if name in exp.header.name]
+        # shallow copies with the name prefix removed, the counts are shared
+        # with the full results object
         relevant_results = []
-        for experiment in results_di['results']:
-            if name in experiment['header']['name']:
-                experiment['header']['name'] = experiment['header']['name'].split(name)[1]
-                # _round_res_dict(experiment['data']['counts'])
-                relevant_results.append(experiment)
-        results_di['results'] = relevant_results
-        results_obj = qk.result.result.Result.from_dict(results_di)
+        for experiment in experiments:
+            experiment = copy.copy(experiment)
+            experiment.header = copy.copy(experiment.header)
+            experiment.header.name = experiment.header.name.split(name)[1]
+            relevant_results.append(experiment)
+        results_obj = copy.copy(self._last_results_obj)
+        results_obj.results = relevant_results
         if type(obj_in) != str:
             obj_in._last_results_obj = results_obj
         return results_obj
@@ -300,14 +393,138 @@ class Batch():
     
     def flush(self):
         """
-        Flushes everything, effectively a hard reset
+        Flushes everything, effectively a hard reset (a background job that 
+        is already running is left to finish, but its results are dropped)
         """
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = None
         self.circ_list = []
         self._last_circ_list = None
         self._last_results_obj = None    
+        self._slices = {}
+        self._last_slices = {}
         self._known_optims = []
 
 
+class MultiplexedInstance():
+    """ Wraps a quantum instance so that the (small) circuits passed to execute
+        are packed side by side on disjoint tiles of qubits of a single wide 
+        circuit, with (at least) one idle buffer qubit between tiles. The 
+        counts of each member circuit are sliced out of the joint counts and 
+        returned as a results object with one experiment per input circuit
+        (in the same order, with the same names), so it can be used in place 
+        of the instance for execute calls (e.g. by Batch or in a runner loop).
+        
+        Everything else (transpile, backend, ...) is passed through to the 
+        wrapped instance. The wrapped instance should be set up for the wide
+        circuit (e.g. no initial_layout, or one covering all tiles), and 
+        measurement error mitigation is done on the wide circuits """
+    def __init__(self, instance, nb_tiles = None, nb_buffer = 1):
+        """
+        Parameters
+        ----------
+        instance : qiskit quantum instance
+            Used to transpile and run the multiplexed circuits
+        nb_tiles : int or None
+            Max number of circuits per wide circuit, if None as many as fit on
+            the backend
+        nb_buffer : int
+            Number of idle qubits between two tiles
+        """
+        self.instance = instance
+        self.nb_tiles = nb_tiles
+        self.nb_buffer = nb_buffer
+
+    def __getattr__(self, attr):
+        # only called if attr wasn't found on self
+        if attr == 'instance':
+            raise AttributeError(attr)
+        return getattr(self.instance, attr)
+
+    def _get_nb_tiles(self, tile_width):
+        """ Number of circuits of tile_width qubits packed per wide circuit, 
+        raises a ValueError if less than two tiles fit on the backend """
+        nb_qubits = self.instance.backend.configuration().n_qubits
+        nb_fit = (nb_qubits + self.nb_buffer) // (tile_width + self.nb_buffer)
+        if nb_fit < 2:
+            msg = ("Can't fit two tiles of {} qubits (+{} buffer) on the {} qubits"
+                   " of the backend".format(tile_width, self.nb_buffer, nb_qubits))
+            if tile_width >= nb_qubits:
+                msg += (", the circuits look transpiled onto the full device: "
+                        "pass circuits on their logical qubits only (e.g. "
+                        "transpiled for a simulator)")
+            raise ValueError(msg)
+        if self.nb_tiles is not None:
+            nb_fit = min(nb_fit, self.nb_tiles)
+        return nb_fit
+
+    def execute(self, circuits, had_transpiled = False, **kwargs):
+        """
+        Runs circuits as ceil(len(circuits) / nb_tiles) wide circuits, and 
+        returns a results object as though they were run one by one.
+        The circuits must be on their logical qubits only (i.e. not 
+        transpiled onto the full device, a ValueError is raised if they can't
+        be tiled). The wide circuits are always transpiled, had_transpiled 
+        only matters when there is nothing to pack (single circuit or 
+        nb_tiles=1), then the circuits are passed to the instance as they are
+        """
+        circuits = circuits if isinstance(circuits, list) else [circuits]
+        if len(circuits) < 2 or self.nb_tiles == 1:
+            return self.instance.execute(circuits, had_transpiled=had_transpiled, **kwargs)
+        tile_width = max(circ.num_qubits for circ in circuits)
+        nb_clbits = max(circ.num_clbits for circ in circuits)
+        nb_tiles = self._get_nb_tiles(tile_width)
+        step = tile_width + self.nb_buffer
+
+        groups = [circuits[ii:ii+nb_tiles] for ii in range(0, len(circuits), nb_tiles)]
+        wide_circs = []
+        for gg, group in enumerate(groups):
+            wide = qk.QuantumCircuit(step * len(group) - self.nb_buffer, 
+                                     nb_clbits * len(group),
+                                     name = 'multiplexed{}'.format(gg))
+            for jj, circ in enumerate(group):
+                wide = wide.compose(
+                    circ, 
+                    qubits = list(range(jj*step, jj*step + circ.num_qubits)),
+                    clbits = list(range(jj*nb_clbits, jj*nb_clbits + circ.num_clbits)))
+            wide_circs.append(wide)
+        results = self.instance.execute(wide_circs, had_transpiled=False, **kwargs)
+        return self._demultiplex(results, groups, nb_clbits)
+
+    @staticmethod
+    def _demultiplex(results, groups, nb_clbits):
+        """ Slices the counts of each wide circuit into the counts of each of
+        its member circuits (member jj uses clbits [jj*nb_clbits, 
+        jj*nb_clbits + num_clbits) of the wide circuit)"""
+        from qiskit.result.models import ExperimentResultData
+        experiments = []
+        for gg, group in enumerate(groups):
+            wide_counts = results.get_counts(gg)
+            wide_exp = results.results[gg]
+            for jj, circ in enumerate(group):
+                counts = collections.defaultdict(int)
+                lo = jj * nb_clbits
+                for key, val in wide_counts.items():
+                    bits = key.replace(' ', '')
+                    # bit strings are big endian: clbit 0 is the last char
+                    sub = bits[len(bits) - lo - circ.num_clbits:len(bits) - lo]
+                    counts[hex(int(sub, 2))] += val
+                experiment = copy.copy(wide_exp)
+                experiment.data = ExperimentResultData(counts=dict(counts))
+                header = copy.copy(wide_exp.header)
+                header.name = circ.name
+                header.memory_slots = circ.num_clbits
+                header.creg_sizes = [[creg.name, creg.size] for creg in circ.cregs]
+                header.clbit_labels = [[creg.name, ii] for creg in circ.cregs 
+                                       for ii in range(creg.size)]
+                experiment.header = header
+                experiments.append(experiment)
+        results_obj = copy.copy(results)
+        results_obj.results = experiments
+        return results_obj
+
+
 class SafeString():
     """ This class keeps track of previous random strings and guarantees that
         the next random string has not been used before since the object was 
@@ -318,12 +535,13 @@ class SafeString():
         TODO: allow ability to seed sequence"""
     def __init__(self, avoid_on_init = None):
 
+        # (set for constant time look ups)
         if type(avoid_on_init) == NoneType:
-            self._previous_random_objects = []
+            self._previous_random_objects = set()
         elif type(avoid_on_init) == str:
-            self._previous_random_objects = [avoid_on_init]
+            self._previous_random_objects = {avoid_on_init}
         elif type(avoid_on_init) == list:
-            self._previous_random_objects = avoid_on_init
+            self._previous_random_objects = set(avoid_on_init)
     def gen(self, nb_chars = 3):
         """ Generate a guaranteed new random string for given length \n
             nb_chars: (default: 3) length of string you want to gen"""
@@ -334,7 +552,7 @@ class SafeString():
             ct+=1
         if ct>50:
             print("Warning in SafeString: consider increasing length of requested string")
-        self._previous_random_objects.append(new_string)
+        self._previous_random_objects.add(new_string)
         return new_string
 
 # module level instance
@@ -346,10 +564,68 @@ def quick_instance():
     return inst
 
 
+_TRANSPILE_CACHE = collections.OrderedDict()
+_TRANSPILE_CACHE_LOCK = threading.Lock()
+
+def _transpile_key(instance, circuit):
+    """ Key of a circuit in the transpile cache: its qasm, the parameter 
+    objects it holds (two ansatz objects make different Parameters with the 
+    same names) and everything in the instance that changes the transpiled 
+    circuit. None if the circuit can't be turned into qasm """
+    try:
+        qasm = circuit.qasm()
+    except Exception:
+        return None
+    # the cached circuit keeps its Parameters alive, so ids are not reused
+    params = tuple(sorted(id(pp) for pp in circuit.parameters))
+    config = (instance.backend_name,
+              repr(sorted(instance.compile_config.items(), key=str)),
+              repr(sorted(instance.backend_config.items(), key=str)))
+    return (hashlib.sha1(qasm.encode()).hexdigest(), params, config)
+
+def transpile_cached(instance, circuits):
+    """ Same as instance.transpile(circuits), but circuits that were already 
+    transpiled by an instance with the same backend and transpile/backend
+    config are taken from a module level (LRU) cache instead, and duplicates 
+    within circuits are transpiled once. Returns copies, so the output can be 
+    renamed etc... without touching the cache
+    
+    Parameters
+    ----------
+    instance : qiskit QuantumInstance
+        Instance used to transpile the circuits
+    circuits : list of QuantumCircuit
+        Circuits to transpile
+    """
+    circuits = list(circuits)
+    keys = [_transpile_key(instance, circ) for circ in circuits]
+    with _TRANSPILE_CACHE_LOCK:
+        transpiled = [_TRANSPILE_CACHE.get(kk) if kk is not None else None for kk in keys]
+        for kk, tc in zip(keys, transpiled):
+            if tc is not None:
+                _TRANSPILE_CACHE.move_to_end(kk)
+    # circuits to transpile, identical ones (same key) are only transpiled once
+    missing = collections.OrderedDict()
+    for ii, (kk, tc) in enumerate(zip(keys, transpiled)):
+        if tc is None:
+            missing.setdefault(ii if kk is None else kk, []).append(ii)
+    if len(missing) > 0:
+        new_circs = instance.transpile([circuits[idx[0]] for idx in missing.values()])
+        with _TRANSPILE_CACHE_LOCK:
+            for idx, tc in zip(missing.values(), new_circs):
+                for ii in idx:
+                    transpiled[ii] = tc
+                if keys[idx[0]] is not None:
+                    _TRANSPILE_CACHE[keys[idx[0]]] = tc
+            while len(_TRANSPILE_CACHE) > TRANSPILE_CACHE_SIZE:
+                _TRANSPILE_CACHE.popitem(last=False)
+    return [tc.copy(name=circ.name) for tc, circ in zip(transpiled, circuits)]
+
+
 def append_measurements(circuit, measurements, logical_qubits=None):
     """ Append measurements to one circuit:
         TODO: Replace with Weighted pauli ops?"""
-    circ = copy.deepcopy(circuit)
+    circ = circuit.copy()
     num_creg = len(measurements.replace('1',''))
     if num_creg > 0:
         cr = qk.ClassicalRegister(num_creg, 'classical')
@@ -379,7 +655,7 @@ def append_measurements(circuit, measurements, logical_qubits=None):
 def gen_meas_circuits(main_circuit, meas_settings, logical_qubits=None):
     """ MOVE FROM COST  Return a list of measurable circuit based on a main circuit and
     different settings"""
-    c_list = [append_measurements(main_circuit.copy(), m, logical_qubits) 
+    c_list = [append_measurements(main_circuit, m, logical_qubits) 
                   for m in meas_settings] 
     return c_list
 # ------------------------------------------------------
@@ -429,8 +705,18 @@ def gen_res(bo):
            'gp_params_names':bo.model.model.parameter_names()}
     return res
 
-def gen_default_argsbo(f, domain, nb_init, eval_init=False):
-    """ maybe unnecessary"""
+def gen_default_argsbo(f, domain, nb_init, eval_init=False, 
+                       acquisition_nb_workers=None, kernel_fp32=False,
+                       max_history=None):
+    """ maybe unnecessary
+    acquisition_nb_workers: if not None MethodBO maximises the acquisition 
+    function from its anchor points using that many threads (see 
+    optimisers.ParallelAcquisitionOptimizer)
+    kernel_fp32: if True MethodBO's GP computes its kernel distances in 
+    float32, with a numba kernel compiled for nb_params if numba is installed 
+    (see optimisers.Matern52f32)
+    max_history: if not None MethodBO only keeps (about) that many of its most
+    recent points to fit its GP (see MethodBO._trim_data)"""
     default_args = {
            'model_update_interval':1, 
            'hp_update_interval':5, 
@@ -446,7 +732,8 @@ def gen_default_argsbo(f, domain, nb_init, eval_init=False):
                  for i, d in enumerate(domain)]
     # Generate random x uniformly (could implement other randomness) if not provided
     if eval_init:
-        x_init = np.transpose([np.random.uniform(*d, size = nb_init) for d in domain])
+        dom = np.asarray(domain, dtype=float)
+        x_init = dom[:,0] + (dom[:,1] - dom[:,0]) * np.random.random((nb_init, len(dom)))
         y_init = f(x_init)
         numdata_init=None
     else:
@@ -456,6 +743,12 @@ def gen_default_argsbo(f, domain, nb_init, eval_init=False):
         
     default_args.update({'f':f, 'domain':domain_bo, 'X':x_init, 'Y':y_init,
                          'initial_design_numdata': numdata_init})
+    if acquisition_nb_workers is not None:
+        default_args['acquisition_nb_workers'] = acquisition_nb_workers
+    if kernel_fp32:
+        default_args['kernel_fp32'] = True
+    if max_history is not None:
+        default_args['max_history'] = max_history
 
     return default_args
 
@@ -467,10 +760,7 @@ def gen_random_str(nb_chars = 5):
 
 def prefix_to_names(circ_list, st_to_prefix):
     """ Returns a NEW list of circs with new names appended"""
-    circ_list = copy.deepcopy(circ_list)
-    for ii in range(len(circ_list)):
-        circ_list[ii].name = st_to_prefix + circ_list[ii].name 
-    return circ_list
+    return [circ.copy(name=st_to_prefix + circ.name) for circ in circ_list]
 
 
 # Generate noise models
@@ -705,12 +995,8 @@ class Results():
  
     # These don't really need to be in the class, but thought I'd hid them here to reduce ut
     def _diff_between_x(self, X_in):
-        """ Computes the euclidian distance between adjacent X values
-        + Might need to vectorize this in future"""
-        dX = X_in[1:] - X_in[0:-1]
-        dX = [dx.dot(dx) for dx in dX]
-        dX = np.sqrt(np.array(dX))
-        return dX
+        """ Computes the euclidian distance between adjacent X values"""
+        return _diff_between_x(X_in)
     
     def _decide_plot_layout(self, n):
         if n < 3:
@@ -1007,7 +1293,54 @@ def get_H_chain_qubit_op(dist_vec):
         The ground state of the qubit Hamiltonian needs to be corrected by this amount of
         energy to give the real physical energy. This includes the replusive energy between
         the nuclei and the energy shift of the frozen orbitals.
+
+    The ops are memoised on the separations (rounded to 1e-6), a copy of 
+    the cached op is returned
+    """
+    key = _H_chain_key(dist_vec)
+    if key not in _H_CHAIN_CACHE:
+        _H_CHAIN_CACHE[key] = _gen_H_chain_qubit_op(key)
+    return copy.deepcopy(_H_CHAIN_CACHE[key])
+
+def get_H_chain_qubit_op_batch(dist_arr, n_jobs = None):
+    """
+    get_H_chain_qubit_op for each row of dist_arr, each distinct geometry is 
+    only computed once (and not at all if it is already memoised)
+
+    Parameters
+    ----------
+    dist_arr : 2d array (nb_geometries, nb_separations)
+        Relative nuclear separations, one geometry per row
+    n_jobs : int or None
+        If not None the pySCF runs of the new geometries are spread over 
+        n_jobs processes with joblib (-1 for all cores)
+
+    Returns
+    -------
+    qubit_ops : list of WeightedPauliOperator
+        One per row of dist_arr
     """
+    keys = [_H_chain_key(row) for row in np.atleast_2d(dist_arr)]
+    missing = [kk for kk in dict.fromkeys(keys) if kk not in _H_CHAIN_CACHE]
+    if n_jobs is None or len(missing) < 2:
+        ops = [_gen_H_chain_qubit_op(kk) for kk in missing]
+    else:
+        import joblib
+        # one BLAS thread per process to avoid oversubscription
+        with joblib.parallel_backend('loky', inner_max_num_threads=1):
+            ops = joblib.Parallel(n_jobs=n_jobs)(
+                joblib.delayed(_gen_H_chain_qubit_op)(kk) for kk in missing)
+    _H_CHAIN_CACHE.update(zip(missing, ops))
+    return [copy.deepcopy(_H_CHAIN_CACHE[kk]) for kk in keys]
+
+# (rounded separations) -> qubit op
+_H_CHAIN_CACHE = {}
+
+def _H_chain_key(dist_vec):
+    return tuple(round(float(dd), 6) for dd in np.atleast_1d(dist_vec))
+
+def _gen_H_chain_qubit_op(dist_vec):
+    """ get_H_chain_qubit_op (not memoised) for a tuple of separations """
     # I have experienced some crashes
     from qiskit.chemistry import QiskitChemistryError
     from openfermion import (
@@ -1018,7 +1351,6 @@ def get_H_chain_qubit_op(dist_vec):
         )
     from openfermionpyscf import run_pyscf
 
-    dist_vec = np.atleast_1d(dist_vec)
     atoms = '; '.join(['H 0 0 {}'.format(dd) for dd in np.cumsum([0] + list(dist_vec))])
     
     atoms = atoms.split('; ')
@@ -1109,6 +1441,36 @@ def enforce_qubit_op_consistency(qubit_ops):
 
     return new_qops
 
+def ground_state_energies(qubit_ops):
+    """
+    Exact ground state energies of a list of qubit ops (on the same number 
+    of qubits), with a single batched diagonalisation. The dense matrix of 
+    each Pauli string is only built once, which works best for ops sharing 
+    their Paulis (e.g. after enforce_qubit_op_consistency)
+
+    Parameters
+    ----------
+    qubit_ops : list of WeightedPauliOperator
+        Operators to diagonalise
+
+    Returns
+    -------
+    energies : 1d array
+        Lowest eigenvalue of each op, signed (CostWPO._min_energy returns 
+        its absolute value instead)
+    """
+    pauli_mats = {}
+    matrices = []
+    for qop in qubit_ops:
+        mat = 0.
+        for weight, pauli in qop.paulis:
+            label = pauli.to_label()
+            if label not in pauli_mats:
+                pauli_mats[label] = pauli.to_matrix()
+            mat = mat + weight * pauli_mats[label]
+        matrices.append(mat)
+    return np.linalg.eigvalsh(np.stack(matrices))[:, 0]
+
 def get_HHLi_qubit_op(d1, d2, get_gs=False, get_exact_E=False, freezeOcc=[0,1], freezeEmpt=[6,7,8,9]):
     """
     Generates the qubit weighted pauli operators for a chain of H + H + Li with
@@ -1365,22 +1727,22 @@ def gen_params_on_subspace(bo_args,
     init_total = bo_args['initial_design_numdata']
     init_subspace = int(nb_ignore_ratio * init_total)
     init_fullspace = init_total - init_subspace
-    zeros = [[0]*zz + list(2*pi*np.random.rand(ii)) for _ in range(init_subspace)]
-    full = [list(2*pi*np.random.rand(ii + zz)) for _ in range(init_fullspace)]
-    return zeros + full
+    zeros = np.zeros((init_subspace, nb_params))
+    zeros[:,zz:] = 2*pi*np.random.rand(init_subspace, ii)
+    full = 2*pi*np.random.rand(init_fullspace, nb_params)
+    return zeros.tolist() + full.tolist()
 
 
 def _diff_between_x(X_in):
         """ Computes the euclidian distance between adjacent X values
-        TODO: Might need to vectorize this in future
         
         Paramaters 
         -----
         X_in : arrave of x-vales, with new x-value of each row"""
-        dX = X_in[1:] - X_in[0:-1]
-        dX = [dx.dot(dx) for dx in dX]
-        dX = np.sqrt(np.array(dX))
-        return dX
+        dX = np.diff(np.asarray(X_in), axis=0)
+        if dX.ndim == 1:
+            dX = dX[:, np.newaxis]
+        return np.linalg.norm(dX, axis=1)
 
 
 def _round_res_dict(di_in):
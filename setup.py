@@ -23,7 +23,9 @@ setup(
         'qiskit',
     ],
     extras_require={'regroup pauli operators in some cost functions': 'openfermion',
-                    'decompose projectors into pauli strings': 'qutip'
+                    'decompose projectors into pauli strings': 'qutip',
+                    'gpu bayesian optimisation (MethodBoTorch)': ['torch', 'botorch'],
+                    'parallel qubit op generation': 'joblib'
     },
     project_urls={},
 )
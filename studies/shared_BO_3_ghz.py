@@ -77,7 +77,8 @@ cst = cost.GHZPauliCost(anz, inst, invert = True)
 bo_args = ut.gen_default_argsbo(f=lambda x: .5, 
                                 domain= [(0, 2*np.pi) for i in range(anz.nb_params)], 
                                 nb_init=0,
-                                eval_init=False)
+                                eval_init=False,
+                                acquisition_nb_workers=-1)
 
 
 # ======================== /
@@ -8,6 +8,7 @@ Created on Mon Jun 8 09:15:32 2020
 import copy
 import dill
 import time
+import logging
 import numpy as np
 import pandas as pd
 import qiskit as qk
@@ -36,13 +37,18 @@ NB_OPT_VEC = [1,2,3]
 NB_SPINS = 7
 NB_DEPTH = 2
 SAVE_DATA = True
+LOG_LEVEL = logging.INFO # DEBUG also logs the number of calls per optim
+USE_BOTORCH = False # True to fit the GPs with BoTorch (needs torch/botorch)
+
+logging.basicConfig(level=LOG_LEVEL, format='%(message)s')
+logger = logging.getLogger(__name__)
 
 nb_init_vec = []
 nb_iter_vec = []
 for opt in NB_OPT_VEC:
     nb_init_vec.append(round((NB_CALLS * NB_IN_IT_RATIO) / opt))
     nb_iter_vec.append(round((NB_CALLS * (1 - NB_IN_IT_RATIO)) / opt))
-    print(opt * (nb_init_vec[-1] + nb_iter_vec[-1]))
+    logger.debug(opt * (nb_init_vec[-1] + nb_iter_vec[-1]))
 
 simulator = qk.Aer.get_backend('qasm_simulator')
 inst = qk.aqua.QuantumInstance(simulator,
@@ -86,7 +92,7 @@ for trial in range(NB_TRIALS):
         bo_args['nb_iter'] = itt*opt
         bo_args['initial_design_numdata'] = init
         runner = op.ParallelRunner([cst]*opt, 
-                                   op.MethodBO, 
+                                   op.MethodBoTorch if USE_BOTORCH else op.MethodBO, 
                                    optimizer_args = bo_args,
                                    share_init = False,
                                    method = 'shared')        
@@ -115,24 +121,38 @@ print('took {} s to init from {} circuits'.format(round(time.time() - t), temp))
 # ======================== /
 # Run optimisation
 # ======================== /
+# Runners are split into two groups with a Batch each: while one group's job is
+# queued/running on the device the other group's results are processed (GP 
+# refits + next points), then its next job is sent off without blocking 
 print("Running optims")
+# (runner, nb iters) pairs of each group, looked up once rather than per iter
+keys = list(runner_dict.keys())
+groups = [[runner_dict[kk] for kk in keys[0::2]], 
+          [runner_dict[kk] for kk in keys[1::2]]]
+batches = [ut.Batch(inst), ut.Batch(inst)]
+
+def submit_group(active, batch):
+    """ Queue and send off the circuits of the active runners of a group"""
+    for run in active:
+        run.next_evaluation_circuits()
+        batch.submit(run)
+    nb_circs = len(batch.circ_list)
+    if nb_circs > 0:
+        batch.execute(block=False)
+    return nb_circs
+
+active = [[run for run, max_itt in gg if 0 < max_itt] for gg in groups]
+temp = [submit_group(aa, bb) for aa, bb in zip(active, batches)]
 for ii in range(max(nb_iter_vec)):
     t = time.time()
-    for opt, trial in runner_dict.keys():
-        run, max_itt = runner_dict[(opt, trial)]
-        if ii < max_itt:
-            run.next_evaluation_circuits()
-            Batch.submit(run)
-            
-    temp = len(Batch.circ_list)
-    Batch.execute()
-    
-    for opt, trial in runner_dict.keys():
-        run, max_itt = runner_dict[(opt, trial)]
-        if ii < max_itt:
-            Batch.result(run)
+    nb_circs = sum(temp)
+    for jj, (group, batch) in enumerate(zip(groups, batches)):
+        for run in active[jj]:
+            batch.result(run)
             run.update()
-    print('iter: {} of {} took {} s for {} circuits'.format(ii+1, max(nb_iter_vec), round(time.time() - t), temp))
+        active[jj] = [run for run, max_itt in group if ii + 1 < max_itt]
+        temp[jj] = submit_group(active[jj], batch)
+    logger.info('iter: %d of %d took %d s for %d circuits', ii+1, max(nb_iter_vec), round(time.time() - t), nb_circs)
     np.random.seed(int(time.time()))
 
 
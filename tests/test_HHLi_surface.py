@@ -1,4 +1,5 @@
 import os
+import hashlib
 import time
 import joblib
 import numpy as np
@@ -18,6 +19,9 @@ method = '2d' # 'independent_plus_random_4' or '2d'
 backend = 5
 nb_init = 15
 nb_iter = 10
+# pack several circuits side by side on the chip per executed circuit (the 
+# costs are then built on their logical qubits, see cost_inst below)
+multiplex = False
 shape = (8, 8)
 positionsHH = np.linspace(0.2, 2.5, shape[0])
 positionsLiH = np.linspace(0.4, 4, shape[0])
@@ -32,15 +36,25 @@ ansatz = qc.ansatz.AnsatzFromQasm(data[0]['qasm'], data[0]['should_prm'])
 
 
 
+def cached_embedding(circuit, ibm_backend, mode, cache_dir='.embedding_cache'):
+    """ find_best_embedding_circuit_backend, with the result kept on disk 
+    (keyed by the circuit, backend and mode) so re-runs don't redo the search"""
+    key = hashlib.sha1((circuit.qasm() + ibm_backend.name() + mode).encode()).hexdigest()
+    path = os.path.join(cache_dir, key + '.dmp')
+    if os.path.exists(path):
+        return jbl.load(path)
+    embedding = find_best_embedding_circuit_backend(circuit, ibm_backend, mode=mode)
+    os.makedirs(cache_dir, exist_ok=True)
+    jbl.dump(embedding, path)
+    return embedding
+
 bem = qc.utilities.BackendManager()
 bem.get_backend(backend, inplace=True)
 provider = qk.IBMQ.get_provider(hub = 'ibmq', group='samsung', project='imperial')
 ibm_backend = provider.get_backend(bem.LIST_OF_DEVICES[backend-1])
 
 if backend != 5:
-    embedding = find_best_embedding_circuit_backend(ansatz.circuit,
-                                                    ibm_backend,
-                                                    mode='010')
+    embedding = cached_embedding(ansatz.circuit, ibm_backend, mode='010')
     initial_layout = embedding_to_initial_layout(embedding)
     mitigation = CompleteMeasFitter
     noise_model = None
@@ -53,49 +67,75 @@ inst = bem.gen_instance_from_current(initial_layout=initial_layout,
                                      optim_lvl=2,
                                      measurement_error_mitigation_cls=mitigation,
                                      noise_model=noise_model)
-rescale = lambda x: (np.log(x +9))
-
-if True:
-    scf_energy = np.zeros(np.product(shape))
-    cir_energy = np.zeros(np.product(shape))
-    cost_list, wpo_list = [], []
-    for ii, cc in enumerate(data):
-        qasm_str = cc['qasm']
-        bool_lst = cc['should_prm']
-        coords = cc['physical_prms']
-        coords = [abs(c) for c in coords]
-        wpo_list.append(qc.utilities.get_H_chain_qubit_op(coords))
-
-
-        atom = 'H 0 0 0; H 0 0 {}; Li 0 0 {}'.format(*np.cumsum(coords))
-        ansatz = qc.ansatz.AnsatzFromQasm(qasm_str, bool_lst)
-
-        cst = qc.cost.ChemistryCost(atom, ansatz, inst, verbose=False)
-        cost_list.append(cst)
-        scf_energy[ii] = cst._min_energy
-        cir_energy[ii] = np.squeeze(cst(ansatz._x_sol))
-
-        print('Min energy from pySCF   : ' + str(scf_energy[ii]))
-        print('Min energy from our circ: ' + str(cir_energy[ii]))
-        print('-----------')
-
-    plt_scf = np.reshape(scf_energy, shape)
-    plt_cir = np.reshape(cir_energy, shape)
-    f , ax = plt.subplots(1, 2, sharey=True, figsize=(10, 4))
-    im = ax[0].pcolor(rescale(plt_scf)) 
-    ax[0].set_title('scf energies (log scale)')
-    ax[0].set_aspect('equal')
-    f.colorbar(im, ax=ax[0])
-
-
-    im = ax[1].pcolor(rescale(plt_cir))
-    ax[1].set_title('circuit energies (log scale)')
-    ax[1].set_aspect('equal')   
-    f.colorbar(im, ax=ax[1])
-
-
-
-wpo_list = [qc.utilities.get_H_chain_qubit_op([dx1,dx2]) for dx1 in positionsHH for dx2 in positionsLiH]
+if multiplex:
+    # the wide circuits are laid out by the transpiler
+    exec_inst = qc.utilities.MultiplexedInstance(
+        bem.gen_instance_from_current(nb_shots=2**9,
+                                      optim_lvl=2,
+                                      measurement_error_mitigation_cls=mitigation,
+                                      noise_model=noise_model))
+    # circuits transpiled for the simulator keep their logical width, so they
+    # can be tiled (circuits transpiled onto the device can't)
+    cost_inst = qc.utilities.quick_instance()
+else:
+    exec_inst = inst
+    cost_inst = inst
+def log_shift(x, shift, out=None):
+    """ log(x + shift) computed in a single buffer (out if provided) """
+    out = np.add(x, shift, out=out)
+    return np.log(out, out=out)
+rescale = lambda x, out=None: log_shift(x, 9, out)
+
+def build_costs(data, inst):
+    """ 
+    Builds the ChemistryCost objects for all the geometries in data. Ansatz 
+    objects are shared between entries with the same circuit, and the 
+    ChemistryCost (i.e. the pySCF run) is only created once per unique 
+    geometry and ansatz
+
+    Returns
+    -------
+    atoms, ansatz_list, cost_list : lists (one element per entry of data)
+    """
+    coords_list = [[abs(c) for c in cc['physical_prms']] for cc in data]
+    atoms = ['H 0 0 0; H 0 0 {}; Li 0 0 {}'.format(d1, d1 + d2) 
+             for d1, d2 in coords_list]
+
+    ansatz_cache, cost_cache, ansatz_list, cost_list = {}, {}, [], []
+    for atom, cc in zip(atoms, data):
+        key = (cc['qasm'], tuple(cc['should_prm']))
+        if key not in ansatz_cache:
+            ansatz_cache[key] = qc.ansatz.AnsatzFromQasm(cc['qasm'], cc['should_prm'])
+        if (atom, key) not in cost_cache:
+            cost_cache[(atom, key)] = qc.cost.ChemistryCost(atom, ansatz_cache[key], 
+                                                            inst, verbose=False)
+        ansatz_list.append(ansatz_cache[key])
+        cost_list.append(cost_cache[(atom, key)])
+    return atoms, ansatz_list, cost_list
+
+setup_plots = True
+if setup_plots:
+    # energies are only plotted/stored, float32 is plenty
+    scf_energy = np.zeros(np.product(shape), dtype=np.float32)
+    cir_energy = np.zeros(np.product(shape), dtype=np.float32)
+    atoms, ansatz_list, chem_cost_list = build_costs(data, inst)
+    scf_energy[:] = [cst._min_energy for cst in chem_cost_list]
+
+    # circuit energies at x_sol: all the circuits in a single job, run in the
+    # background while the grid qubit ops and costs are built (see below)
+    labels = ['g{:03d}x'.format(ii) for ii in range(len(chem_cost_list))]
+    circs = []
+    for cst, ans, label in zip(chem_cost_list, ansatz_list, labels):
+        circs += cst.bind_params_to_meas(ans._x_sol, [label])
+    setup_batch = qc.utilities.Batch(inst)
+    setup_batch.submit(circs, name='setup')
+    setup_batch.execute(block=False)
+
+
+
+DX1, DX2 = np.meshgrid(positionsHH, positionsLiH, indexing='ij')
+coords_arr = np.stack([DX1.ravel(), DX2.ravel()], axis=1)
+wpo_list = qc.utilities.get_H_chain_qubit_op_batch(coords_arr, n_jobs=-1)
 wpo_list = qc.utilities.enforce_qubit_op_consistency(wpo_list)
 
 
@@ -104,11 +144,16 @@ wpo_list = qc.utilities.enforce_qubit_op_consistency(wpo_list)
 ansatz = qc.ansatz.AnsatzFromQasm(data[0]['qasm'], data[0]['should_prm'])
 # ansatz = qc.ansatz.RandomAnsatz(4,2)
 # print('warning - this is a random ansatz')
-cost_list = [qc.cost.CostWPO(ansatz, inst, ww) for ww in wpo_list]
-ed_energies_mat = [c._min_energy for c in cost_list]
-ed_energies_mat = np.reshape(ed_energies_mat, shape)
-
-domain = np.array([(0, 2*pi) for i in range(cost_list[0].ansatz.nb_params)])
+# all costs share the ansatz and (after enforce_qubit_op_consistency) the 
+# measurement bases, so their parametrised circuits are only transpiled once 
+# and each iteration only binds new parameters
+cost_list = [qc.cost.CostWPO(ansatz, cost_inst, ww) for ww in wpo_list]
+# exact energies, as absolute values like CostWPO._min_energy (and the 'ed' 
+# entry of older dumps)
+ed_energies_mat = np.abs(qc.utilities.ground_state_energies(wpo_list)).reshape(shape).astype(np.float32)
+
+domain = np.empty((cost_list[0].ansatz.nb_params, 2))
+domain[:, 0], domain[:, 1] = 0., 2*pi
 bo_args = qc.utilities.gen_default_argsbo(f=lambda: 0.5,
                                           domain=domain,
                                           nb_init=nb_init,
@@ -123,11 +168,37 @@ runner = qc.optimisers.ParallelRunner(cost_list,
                                       method = method)
 
 
+if setup_plots:
+    results = setup_batch.result('setup')
+    cir_energy[:] = [np.squeeze(cst.evaluate_cost(results, name=label))
+                     for cst, label in zip(chem_cost_list, labels)]
+
+    for ii in range(len(chem_cost_list)):
+        print('Min energy from pySCF   : ' + str(scf_energy[ii]))
+        print('Min energy from our circ: ' + str(cir_energy[ii]))
+        print('-----------')
+
+    # (views, no copies)
+    plt_scf = scf_energy.reshape(shape)
+    plt_cir = cir_energy.reshape(shape)
+    f , ax = plt.subplots(1, 2, sharey=True, figsize=(10, 4))
+    im = ax[0].pcolor(rescale(plt_scf)) 
+    ax[0].set_title('scf energies (log scale)')
+    ax[0].set_aspect('equal')
+    f.colorbar(im, ax=ax[0])
+
+
+    im = ax[1].pcolor(rescale(plt_cir))
+    ax[1].set_title('circuit energies (log scale)')
+    ax[1].set_aspect('equal')   
+    f.colorbar(im, ax=ax[1])
+
+
 runner.next_evaluation_circuits()
 print('there are {} init circuits'.format(len(runner.circs_to_exec)))
 
 t = time.time()
-results = inst.execute(runner.circs_to_exec,had_transpiled=True)
+results = exec_inst.execute(runner.circs_to_exec,had_transpiled=True)
 print('took {:2g} s to run inits'.format(time.time() - t))
 
 t = time.time()
@@ -140,7 +211,7 @@ for ii in range(bo_args['nb_iter']):
     print('took {:2g} s to optim acq function'.format(time.time()  - t))
 
     t = time.time()
-    results = inst.execute(runner.circs_to_exec,had_transpiled=True)
+    results = exec_inst.execute(runner.circs_to_exec,had_transpiled=True)
     print('took {:2g} s to run circs'.format(time.time()  - t))
 
     t = time.time()
@@ -148,12 +219,12 @@ for ii in range(bo_args['nb_iter']):
     print('took {:2g} s to run {}th update'.format(time.time() - t, ii))
 
 
-x_opt_pred = [opt.best_x for opt in runner.optim_list]
+x_opt_pred = runner.best_x_matrix
 runner.shot_noise(x_opt_pred, nb_trials=1)
-results = inst.execute(runner.circs_to_exec,had_transpiled=True)
+results = exec_inst.execute(runner.circs_to_exec,had_transpiled=True)
 runner._last_results_obj = results
 opt_energies = runner._results_from_last_x()
-opt_energies_mat = np.reshape(np.squeeze(opt_energies), shape)
+opt_energies_mat = np.reshape(opt_energies, shape).astype(np.float32)
 
 
 f , ax = plt.subplots(1, 2, sharey=True, figsize=(10, 4))
@@ -179,13 +250,18 @@ cst = qc.cost.CostWPO
 #%% Save data
 # Importing and plotting data
 fname = 'h3_paris_64_init{}_iter{}_method{}_optAnsatz.dmp'.format(nb_init,nb_iter,method[-2:])
-with open(fname, 'wb') as f:
-    data = {'shape':shape,
-            'positions':positions,
-            'opt':opt_energies_mat,
-            'scf':scf_energy,
-            'optims':runner.optim_list}
-    joblib.dump(data, f)
+try:
+    import lz4 # fast compression in joblib
+    compress = ('lz4', 1)
+except ImportError:
+    compress = ('zlib', 1)
+data = {'shape':shape,
+        'positions':positions,
+        'opt':opt_energies_mat,
+        'scf':scf_energy,
+        'optims':runner.optim_list}
+# (joblib.load detects the compression)
+joblib.dump(data, fname, compress=compress)
 
 
 
@@ -205,8 +281,13 @@ data = joblib.load(fname)
 scf_energy = data['scf']
 opt_energies_mat = data['opt']
 positions = data['positions']
+# (anti)symmetrised VQE energies, computed once for all the plots
+opt_sym = opt_energies_mat + opt_energies_mat.T
+opt_antisym = np.abs(opt_energies_mat - opt_energies_mat.T)
+opt_sym /= 2
+opt_antisym /= 2
 
-rescale = lambda x: np.log(x +2)
+rescale = lambda x, out=None: log_shift(x, 2, out)
 
 
 # Plot line by line
@@ -217,7 +298,7 @@ ax[0].set_xlabel('x2-x1 (A)')
 ax[0].legend(['d32: ' + str(round(p, 2)) for p in positions], loc='upper right')
 
 
-im = ax[1].plot(positions, ((opt_energies_mat + opt_energies_mat.T)/2))
+im = ax[1].plot(positions, opt_sym)
 ax[1].set_title('(VQE energy)')
 ax[1].set_xlabel('x2-x1 (A)')
 f.legend()
@@ -232,7 +313,7 @@ ax[0].set_xlabel('x2-x1 (A)')
 f.colorbar(im, ax=ax[0])
      
 
-im = ax[1].pcolor((opt_energies_mat + opt_energies_mat.T)/2, vmin = -1.6, vmax = -0.8)
+im = ax[1].pcolor(opt_sym, vmin = -1.6, vmax = -0.8)
 ax[1].set_title('VQE energy: Paris')
 ax[1].set_aspect('equal')
 ax[1].set_xlabel('x2-x1 (A)')
@@ -248,7 +329,7 @@ ax[0].set_ylabel('Eopt - Eexact')
 ax[0].set_title('actual VQE error')
 f.legend(['d32:'+str(round(p, 2)) for p in positions])
 
-ax[1].plot(positions, abs(opt_energies_mat - opt_energies_mat.T)/2 )
+ax[1].plot(positions, opt_antisym)
 ax[1].set_xlabel('x2-x1')
 ax[1].set_title('Antisymmetric error')
 
@@ -275,10 +356,11 @@ ax[1].set_title('Antisymmetric error')
 #     nn_mask = convolve2d(x, y, 'valid')
 # else:
 #     nn_mask = 5*np.ones(shape)
+# # flat int mask, so the coords of each iteration are a single array op
+# nn_mask = np.ravel(nn_mask).astype(int)
 
 # for ii in range(bo_args['nb_iter']):
 #     these_coords = bo_args['initial_design_numdata'] + ii*nn_mask
-#     these_coords = [int(cc) for cc in np.ravel(these_coords)]
 
 #     y_ii = [opt[ii].optimiser.Y[these_coords[ii]] for ii in range(shape[0]**2)]
 #     y_ii = np.squeeze(y_ii).reshape(*shape)
@@ -304,7 +386,6 @@ ax[1].set_title('Antisymmetric error')
 
 # for ii in range(bo_args['nb_iter']):
 #     these_coords = bo_args['initial_design_numdata'] + ii*nn_mask
-#     these_coords = [int(cc) for cc in np.ravel(these_coords)]
 
 
 #     y_best_ii = [min(opt[ii].optimiser.Y[:these_coords[ii]]) for ii in range(shape[0]**2)]
@@ -332,7 +413,6 @@ ax[1].set_title('Antisymmetric error')
 
 # for ii in range(bo_args['nb_iter']):
 #     these_coords = bo_args['initial_design_numdata'] + ii*nn_mask
-#     these_coords = [int(cc) for cc in np.ravel(these_coords)]
 
 #     y_ii = [opt[ii].optimiser.Y[these_coords[ii]] for ii in range(shape[0]**2)]
 #     y_ii = np.squeeze(y_ii).reshape(*shape)
@@ -354,6 +434,7 @@ ax[1].set_title('Antisymmetric error')
 # import joblib
 # fname = 'h3_lin_circs_paris_init{}_iter{}_method{}.dmp'.format(nb_init,nb_iter,method[-2:])
 # with open(fname, 'wb') as f:
+#     # 'ed' is signed (older dumps: abs values from CostWPO._min_energy)
 #     data = {'ed':ed_energies_mat,
 #             'opt':opt_energies_mat,
 #             'optims':runner.optim_list}
@@ -7,6 +7,7 @@ Created on Fri Mar  6 16:10:36 2020
 
 import sys
 import copy
+import logging
 import numpy as np
 import qiskit as qk
 import matplotlib.pyplot as plt
@@ -29,7 +30,7 @@ def add_reduced_domain(params, delta, domain):
 # ===================
 pi= np.pi
 NB_SHOTS_DEFAULT = 1028
-OPTIMIZATION_LEVEL_DEFAULT = 0
+OPTIMIZATION_LEVEL_DEFAULT = 3
 TRANSPILER_SEED_DEFAULT = 10
 NB_INIT = 5
 NB_ITER = 5
@@ -37,6 +38,10 @@ NB_SWAPS = 0
 NB_DELTA = pi/8
 CHOOSE_DEVICE = True
 SAVE_DATA = True
+LOG_LEVEL = logging.INFO # DEBUG to follow the optim sizes at each iter
+
+logging.basicConfig(level=LOG_LEVEL, format='%(message)s')
+logger = logging.getLogger(__name__)
 
 
 # ===================
@@ -55,7 +60,8 @@ if CHOOSE_DEVICE:
                                          nb_shots=NB_SHOTS_DEFAULT,
                                          optim_lvl=OPTIMIZATION_LEVEL_DEFAULT,
                                          measurement_error_mitigation_cls=CompleteMeasFitter,
-                                         noise_model=noise_model)
+                                         noise_model=noise_model,
+                                         sabre=True)
     
 
 
@@ -94,7 +100,8 @@ if NB_SWAPS == -1:
 bo_args = ut.gen_default_argsbo(f=lambda x: .5, 
                                 domain=domain, 
                                 nb_init=NB_INIT,
-                                eval_init=False)
+                                eval_init=False,
+                                acquisition_nb_workers=-1)
 
 bo_args['nb_iter'] = NB_ITER*len(cost_list) + NB_INIT
 bo_args['acquisition_weight'] = 4
@@ -158,9 +165,9 @@ for ii in range(NB_ITER):
     runner.init_optimisers()    
     runner.update()
     try:
-        print(len(runner.optim_list[0]._x_mp))
+        logger.debug('nb evals: %d', len(runner.optim_list[0]._x_mp))
     except:
-        print(len(runner.optim_list[0].optimiser.X))
+        logger.debug('nb evals: %d', len(runner.optim_list[0].optimiser.X))
 
 
 try: 
@@ -191,6 +198,61 @@ bopt_lines = runner._results_from_last_x()
 
 
 
+# ======================== /
+# Costs with different nb_params in the same runner (6 and 9 params)
+# ======================== /
+mixed_anz = [anz_vec[0], anz.RegularXYZAnsatz(3, 2)]
+mixed_costs = [cost.GHZPauliCost3qubits(az, inst, invert=True) for az in mixed_anz]
+mixed_args = [ut.gen_default_argsbo(f=lambda x: .5,
+                                    domain=[(0, 2*np.pi)]*az.nb_params,
+                                    nb_init=NB_INIT,
+                                    eval_init=False) for az in mixed_anz]
+mixed_runner = op.ParallelRunner(mixed_costs, 
+                                 opt_bo, 
+                                 optimizer_args = mixed_args,
+                                 share_init = False,
+                                 method = 'independent',
+                                 nb_workers = 2)
+# without share_init each optim asks for its own nb_init points
+mixed_runner.next_evaluation_circuits()
+assert all(len(x) == NB_INIT for x in mixed_runner._last_x_new)
+assert len(mixed_runner.circs_to_exec) == NB_INIT * sum(mixed_runner._nb_meas_circuits)
+Batch.submit_exec_res(mixed_runner)
+mixed_runner.init_optimisers()
+for ii in range(2):
+    mixed_runner.next_evaluation_circuits()
+    Batch.submit_exec_res(mixed_runner)
+    mixed_runner.update()
+for opt, az in zip(mixed_runner.optim_list, mixed_anz):
+    assert opt.optimiser.X.shape == (NB_INIT + 2, az.nb_params)
+    assert not np.any(np.isnan(opt.optimiser.X))
+
+
+# ======================== /
+# MethodBO.update keeps GPyOpt's X/Y as views on its data buffers
+# ======================== /
+bo_views = op.MethodBO(copy.deepcopy(bo_args))
+x_init = np.random.uniform(0, 1, (NB_INIT, nb_params))
+y_init = np.random.uniform(0, 1, (NB_INIT, 1))
+bo_views.update(x_init, y_init)
+assert bo_views.optimiser.X.shape == (NB_INIT, nb_params)
+assert np.array_equal(bo_views.optimiser.X, x_init)
+assert np.array_equal(bo_views.optimiser.Y, y_init)
+for ii in range(5):
+    x_new = np.random.uniform(0, 1, (1, nb_params))
+    y_new = np.random.uniform(0, 1, (1, 1))
+    bo_views.update(x_new, y_new)
+    X_buf, Y_buf, X_view, Y_view = bo_views._data_buffers
+    assert np.shares_memory(bo_views.optimiser.X, X_buf)
+    assert np.shares_memory(bo_views.optimiser.Y, Y_buf)
+    # new points are copied into the buffers, not aliased
+    assert not np.shares_memory(bo_views.optimiser.X, x_new)
+    assert np.array_equal(bo_views.optimiser.X[-1], x_new[0])
+    assert np.array_equal(bo_views.optimiser.Y[-1], y_new[0])
+assert bo_views.optimiser.X.shape == (NB_INIT + 5, nb_params)
+assert np.array_equal(bo_views.optimiser.X[:NB_INIT], x_init)
+
+
 # ======================== /
 # Save BO's in different files
 # ======================== /